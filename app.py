@@ -1,12 +1,18 @@
 import streamlit as st
+import csv
 import sys
 from pathlib import Path
 import tempfile
+import threading
 import io
+import time
+from collections import namedtuple
+from datetime import datetime
 
 # Adiciona o diretório atual ao path para importar o analisador
 sys.path.insert(0, str(Path(__file__).parent))
-from seo_log_analyzer import SEOLogAnalyzer
+from seo_log_analyzer import SEOLogAnalyzer, URLCanonicalizer, BOT_PATTERNS, STATUS_CLASSES
+from log_formats import LOG_FORMATS
 
 
 # Configuração da página
@@ -80,12 +86,305 @@ with st.sidebar:
     st.markdown("""
     - Apache Common Log
     - Apache Combined Log
-    - Nginx Access Log
+    - Nginx Access Log (inclusive `log_format` customizado e JSON)
+    - IIS W3C Extended
+    - CloudFront / CDN em TSV
+    
+    O formato é detectado automaticamente pelas primeiras linhas.
     
     **⚠️ Arquivos Grandes:**
     Suporta até 2GB total. 
     Processa logs rotacionados (.1, .2, .3, etc).
     """)
+    
+    st.divider()
+    
+    st.header("⚙️ Opções de Análise")
+    format_labels = {'auto': 'Detectar automaticamente'}
+    format_labels.update({name: cls.description for name, cls in LOG_FORMATS.items()})
+    format_labels['nginx'] = 'log_format customizado do Nginx'
+    log_format = st.selectbox(
+        "Formato do log",
+        options=list(format_labels.keys()),
+        format_func=lambda name: format_labels[name]
+    )
+    nginx_log_format = st.text_input(
+        "Diretiva log_format do Nginx",
+        placeholder='$remote_addr - $remote_user [$time_local] "$request" $status ...',
+        disabled=log_format != 'nginx'
+    )
+    
+    url_mode_labels = {
+        'raw': 'URL original',
+        'canonical': 'URL canônica (sem utm_*, query ordenada)',
+        'template': 'Template (/produto/{id})'
+    }
+    url_mode = st.selectbox(
+        "Agrupamento de URLs",
+        options=list(url_mode_labels.keys()),
+        format_func=lambda mode: url_mode_labels[mode],
+        help="Agrupar por URL canônica ou template reduz muito o tamanho dos relatórios em logs de e-commerce"
+    )
+    url_templates = st.text_area(
+        "Templates de URL (um por linha)",
+        placeholder="/produto/{id}\n/categoria/{slug}",
+        disabled=url_mode == 'raw',
+        help="Templates explícitos têm prioridade sobre a detecção automática de IDs numéricos"
+    )
+    lowercase_paths = st.checkbox(
+        "Ignorar maiúsculas/minúsculas no caminho",
+        disabled=url_mode == 'raw',
+        help="Agrupa /Produto/A e /produto/a. Use só se o servidor não diferencia maiúsculas (ex: IIS)"
+    )
+    
+    use_time_window = st.checkbox("Filtrar por período")
+    time_window = st.date_input(
+        "Período (início e fim)",
+        value=(),
+        disabled=not use_time_window,
+        help="Apenas requisições dentro do período entram nos relatórios"
+    )
+    # date_input devolve uma data só enquanto o intervalo está sendo escolhido
+    time_window_incomplete = use_time_window and len(time_window) != 2
+    if time_window_incomplete:
+        st.warning("Selecione a data de início e a de fim do período (para um único dia, clique duas vezes nele)")
+    bot_filter = st.multiselect(
+        "Analisar apenas estes bots",
+        options=list(BOT_PATTERNS.keys()),
+        help="Vazio = todo o tráfego. O filtro é aplicado antes do parse completo de cada linha"
+    )
+    dedup = st.checkbox(
+        "Remover linhas duplicadas",
+        help="Útil ao enviar logs rotacionados ou de vários servidores que se sobrepõem. "
+             "As duplicatas são contadas e aparecem no relatório"
+    )
+    quick_preview = st.checkbox(
+        "Prévia durante a análise",
+        value=True,
+        help="Em arquivos grandes mostra números projetados a partir do trecho já lido enquanto a análise roda"
+    )
+
+# Tamanho a partir do qual vale a pena mostrar a prévia
+PREVIEW_MIN_MB = 50
+
+# Contadores copiados da análise em andamento para a prévia
+PreviewSnapshot = namedtuple('PreviewSnapshot', ['fraction', 'parsed_lines', 'bot_visits'])
+
+# Intervalo de atualização da interface enquanto a análise roda
+POLL_INTERVAL = 0.5
+
+
+# Ordenações do explorador de URLs (chaves de SEOLogAnalyzer.query_urls)
+URL_SORT_LABELS = {
+    'crawls': 'Rastreios',
+    'last_crawl': 'Último rastreio',
+    'first_crawl': 'Primeiro rastreio',
+    'bots': 'Bots diferentes',
+    'url': 'URL'
+}
+
+# Resoluções das séries de taxa de rastreio (chaves de SEOLogAnalyzer.crawl_rate_summary)
+CRAWL_RATE_LABELS = {
+    'minute': 'Minuto',
+    'hour': 'Hora',
+    'day': 'Dia'
+}
+
+
+def rows_to_csv(rows):
+    """Converte linhas (dicts) em CSV; usado nos downloads gerados sob demanda"""
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+# download_button aceita um callable em data a partir do Streamlit 1.52
+DEFERRED_DOWNLOADS = tuple(int(part) for part in st.__version__.split('.')[:2]) >= (1, 52)
+
+
+def deferred_download(generate):
+    """Dados adiados para o clique no botão; em versões antigas, gerados na hora"""
+    return generate if DEFERRED_DOWNLOADS else generate()
+
+
+def read_result_file(path):
+    """Download adiado: o arquivo só é lido quando o usuário clica no botão"""
+    return deferred_download(lambda: Path(path).read_bytes())
+
+
+def format_seconds(seconds):
+    """Formata segundos como mm:ss"""
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class AnalysisJob:
+    """Executa a análise numa thread de fundo.
+    
+    A thread só atualiza atributos do job; o script do Streamlit consulta o
+    estado a cada rerun, sem bloquear e sem chamar st.* fora da sessão.
+    """
+    
+    def __init__(self, uploaded_files, analyzer_options, with_preview=False):
+        self.uploaded_files = list(uploaded_files)
+        self.analyzer_options = analyzer_options
+        self.with_preview = with_preview
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        
+        self.stage = "📦 Preparando arquivos..."
+        self.progress = None
+        self.preview = None
+        self.results = None
+        self.error = None
+        self.done = False
+    
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+    
+    def start(self):
+        self.thread.start()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def _run(self):
+        try:
+            self._analyze()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+    
+    def _analyze(self):
+        # Diretório próprio por análise para não misturar sessões
+        output_dir = Path(tempfile.mkdtemp(prefix='seo_log_'))
+        log_dir = output_dir / 'logs'
+        log_dir.mkdir()
+        
+        # Um arquivo temporário por upload: o analisador intercala as fontes por timestamp
+        log_paths = []
+        for idx, uploaded_file in enumerate(self.uploaded_files):
+            if self.cancelled:
+                return
+            self.stage = f"📄 Preparando {idx+1}/{len(self.uploaded_files)}: {uploaded_file.name}"
+            
+            log_path = log_dir / f"{idx:03d}_{Path(uploaded_file.name).name}"
+            log_path.write_bytes(uploaded_file.getvalue())
+            log_paths.append(log_path)
+        
+        self.stage = "🔍 Parseando linhas do log..."
+        analyzer = SEOLogAnalyzer(log_paths, **self.analyzer_options)
+        
+        def on_progress(progress):
+            self.progress = progress
+            # Roda na thread da análise, então copiar os contadores aqui é seguro;
+            # a prévia sai da própria leitura, sem uma segunda passada no arquivo
+            if self.with_preview and 0 < progress.fraction < 1:
+                self.preview = PreviewSnapshot(progress.fraction, analyzer.parsed_lines,
+                                               dict(analyzer.bot_visits))
+        
+        analyzer.analyze(progress_callback=on_progress, cancel_event=self.cancel_event)
+        if analyzer.cancelled:
+            return
+        
+        self.stage = "📊 Gerando relatórios..."
+        report = analyzer.generate_report()
+        
+        # TXT Report
+        txt_file = output_dir / 'relatorio_seo.txt'
+        with open(txt_file, 'w', encoding='utf-8') as f:
+            f.write(report)
+        
+        # JSON Report
+        json_file = output_dir / 'relatorio_seo.json'
+        analyzer.save_json_report(json_file)
+        
+        # CSVs
+        self.stage = "Gerando CSVs..."
+        csv_url_ranking = output_dir / 'urls_ranking.csv'
+        analyzer.generate_csv_url_ranking(csv_url_ranking)
+        
+        csv_error_urls = output_dir / 'urls_com_erros.csv'
+        analyzer.generate_csv_error_urls(csv_error_urls)
+        
+        csv_googlebot = output_dir / 'analise_googlebot.csv'
+        analyzer.generate_csv_googlebot_analysis(csv_googlebot)
+        
+        csv_llm = output_dir / 'comparacao_llm_bots.csv'
+        analyzer.generate_csv_llm_bots_comparison(csv_llm)
+        
+        csv_sessions = output_dir / 'sessoes_bots.csv'
+        analyzer.generate_csv_bot_sessions(csv_sessions)
+        
+        self.preview = None
+        self.stage = "✅ Análise concluída!"
+        self.results = {
+            'analyzer': analyzer,
+            'txt_file': txt_file,
+            'json_file': json_file,
+            'csv_url_ranking': csv_url_ranking,
+            'csv_error_urls': csv_error_urls,
+            'csv_googlebot': csv_googlebot,
+            'csv_llm': csv_llm,
+            'csv_sessions': csv_sessions,
+            'crawl_rate': analyzer.crawl_rate_summary(),
+            'report': report
+        }
+
+
+def render_preview(preview):
+    """Mostra métricas projetadas a partir do trecho já lido pela análise"""
+    st.info(f"⚡ Prévia com {preview.fraction:.0%} do arquivo lido. Números projetados para o "
+            f"arquivo inteiro, supondo o restante parecido com o trecho lido — refinando...")
+    
+    scale = 1 / preview.fraction
+    requests_est = round(preview.parsed_lines * scale)
+    bots_est = round(sum(preview.bot_visits.values()) * scale)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Requisições (projeção)", f"~{requests_est:,}")
+    with col2:
+        st.metric("Visitas de Bots (projeção)", f"~{bots_est:,}")
+    with col3:
+        bot_percentage = (bots_est / requests_est * 100) if requests_est > 0 else 0
+        st.metric("% Tráfego de Bots", f"~{bot_percentage:.1f}%")
+    
+    bots_data = [
+        {'Bot': bot, 'Visitas até agora': count, 'Visitas (projeção)': round(count * scale)}
+        for bot, count in sorted(preview.bot_visits.items(), key=lambda x: x[1], reverse=True)[:10]
+    ]
+    if bots_data:
+        st.dataframe(bots_data, use_container_width=True)
+
+
+def render_job(job):
+    """Mostra o estado de uma análise em andamento"""
+    st.subheader(f"⚙️ {job.stage}")
+    
+    progress = job.progress
+    if progress is None:
+        st.progress(0)
+        st.text("Aguardando início da leitura...")
+    else:
+        st.progress(min(100, int(progress.fraction * 100)))
+        st.text(f"{progress.lines:,} linhas • "
+                f"{progress.bytes_read / (1024*1024):,.1f} de {progress.total_bytes / (1024*1024):,.1f} MB • "
+                f"{progress.lines_per_sec:,.0f} linhas/s ({progress.bytes_per_sec / (1024*1024):.1f} MB/s) • "
+                f"ETA {format_seconds(progress.eta)}")
+    
+    if job.preview is not None:
+        render_preview(job.preview)
+
 
 # Upload do arquivo
 st.header("📁 Upload de Arquivos de Log")
@@ -96,6 +395,8 @@ uploaded_files = st.file_uploader(
     help="📝 Aceita logs rotacionados (.1, .2, .3, etc). Suporta até 2GB total. Processamento otimizado para múltiplos arquivos grandes."
 )
 
+job = st.session_state.get('job')
+
 if uploaded_files:
     # Informações dos arquivos
     total_size_mb = sum(f.size for f in uploaded_files) / (1024 * 1024)
@@ -114,115 +415,54 @@ if uploaded_files:
         st.warning("⚠️ Arquivos muito grandes (>1.5GB). O processamento pode levar vários minutos. Para volumes maiores, considere usar a versão CLI.")
     
     # Botão para iniciar análise
-    if st.button("🚀 Iniciar Análise", type="primary", use_container_width=True):
-        try:
-            # Container para progresso
-            progress_container = st.container()
-            
-            with progress_container:
-                if num_files == 1:
-                    st.subheader(f"⚙️ Processando {uploaded_files[0].name}...")
-                else:
-                    st.subheader(f"⚙️ Processando {num_files} arquivos...")
-                
-                # Barra de progresso geral
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                file_progress = st.empty()
-                
-                # Cria arquivo temporário consolidado processando um por um
-                status_text.text("📦 Preparando arquivos...")
-                progress_bar.progress(5)
-                
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.log', mode='w', encoding='utf-8') as tmp_file:
-                    tmp_file_path = tmp_file.name
-                    
-                    # Processa cada arquivo
-                    for idx, uploaded_file in enumerate(uploaded_files):
-                        file_progress.text(f"📄 Processando {idx+1}/{num_files}: {uploaded_file.name}")
-                        
-                        # Progress por arquivo (5% a 25% do total)
-                        file_prog = 5 + int((idx / num_files) * 20)
-                        progress_bar.progress(file_prog)
-                        
-                        # Lê e escreve em chunks para economizar memória
-                        content = uploaded_file.getvalue().decode('utf-8', errors='ignore')
-                        tmp_file.write(content)
-                        
-                        if idx < len(uploaded_files) - 1:
-                            tmp_file.write('\n')
-                        
-                        # Libera memória
-                        del content
-                
-                file_progress.empty()
-                status_text.text("✅ Arquivos preparados. Iniciando análise...")
-                progress_bar.progress(30)
-                
-                # Analisa o log consolidado
-                analyzer = SEOLogAnalyzer(tmp_file_path)
-                
-                status_text.text("🔍 Parseando linhas do log...")
-                progress_bar.progress(40)
-                
-                analyzer.analyze()
-                
-                status_text.text("📊 Gerando relatórios...")
-                progress_bar.progress(60)
-                
-                # Gera relatório texto
-                report = analyzer.generate_report()
-                
-                progress_bar.progress(80)
-                status_text.text("Gerando CSVs...")
-                
-                # Gera arquivos em memória
-                output_dir = Path(tmp_file_path).parent
-                
-                # TXT Report
-                txt_file = output_dir / 'relatorio_seo.txt'
-                with open(txt_file, 'w', encoding='utf-8') as f:
-                    f.write(report)
-                
-                # JSON Report
-                json_file = output_dir / 'relatorio_seo.json'
-                analyzer.save_json_report(json_file)
-                
-                # CSVs
-                csv_url_ranking = output_dir / 'urls_ranking.csv'
-                analyzer.generate_csv_url_ranking(csv_url_ranking)
-                
-                csv_error_urls = output_dir / 'urls_com_erros.csv'
-                analyzer.generate_csv_error_urls(csv_error_urls)
-                
-                csv_googlebot = output_dir / 'analise_googlebot.csv'
-                analyzer.generate_csv_googlebot_analysis(csv_googlebot)
-                
-                csv_llm = output_dir / 'comparacao_llm_bots.csv'
-                analyzer.generate_csv_llm_bots_comparison(csv_llm)
-                
-                progress_bar.progress(100)
-                status_text.text("✅ Análise concluída!")
-            
-            # Armazena resultados na sessão
-            st.session_state['analysis_complete'] = True
-            st.session_state['analyzer'] = analyzer
-            st.session_state['txt_file'] = txt_file
-            st.session_state['json_file'] = json_file
-            st.session_state['csv_url_ranking'] = csv_url_ranking
-            st.session_state['csv_error_urls'] = csv_error_urls
-            st.session_state['csv_googlebot'] = csv_googlebot
-            st.session_state['csv_llm'] = csv_llm
-            st.session_state['report'] = report
-            
-            if num_files == 1:
-                st.success(f"🎉 Análise de **{uploaded_files[0].name}** completa! Role para baixo para ver os resultados.")
-            else:
-                st.success(f"🎉 Análise de **{num_files} arquivos** completa! Role para baixo para ver os resultados.")
-            
-        except Exception as e:
-            st.error(f"❌ Erro ao processar arquivo: {str(e)}")
-            st.exception(e)
+    job_running = job is not None and not job.done
+    if st.button("🚀 Iniciar Análise", type="primary", use_container_width=True,
+                 disabled=job_running or time_window_incomplete):
+        canonicalizer = None
+        if url_mode != 'raw':
+            templates = [t.strip() for t in url_templates.splitlines() if t.strip()]
+            canonicalizer = URLCanonicalizer(lowercase_path=lowercase_paths, templates=templates)
+        since = until = None
+        if use_time_window:
+            since = datetime.combine(time_window[0], datetime.min.time())
+            until = datetime.combine(time_window[1], datetime.max.time())
+        analyzer_options = dict(url_mode=url_mode, canonicalizer=canonicalizer,
+                                since=since, until=until, bot_filter=bot_filter, dedup=dedup,
+                                log_format=nginx_log_format if log_format == 'nginx' else log_format)
+        
+        job = AnalysisJob(uploaded_files, analyzer_options,
+                          with_preview=quick_preview and total_size_mb >= PREVIEW_MIN_MB)
+        job.start()
+        st.session_state['job'] = job
+        st.session_state['job_files'] = [f.name for f in uploaded_files]
+        st.session_state['analysis_complete'] = False
+
+# Acompanha a análise em andamento sem bloquear o script
+if job is not None:
+    if not job.done:
+        render_job(job)
+        if st.button("⛔ Cancelar análise"):
+            job.cancel()
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+    
+    del st.session_state['job']
+    file_names = st.session_state.pop('job_files', [])
+    
+    if job.error is not None:
+        st.error(f"❌ Erro ao processar arquivo: {str(job.error)}")
+        st.exception(job.error)
+    elif job.results is None:
+        st.warning("⛔ Análise cancelada.")
+    else:
+        # Armazena resultados na sessão
+        st.session_state.update(job.results)
+        st.session_state['analysis_complete'] = True
+        
+        if len(file_names) == 1:
+            st.success(f"🎉 Análise de **{file_names[0]}** completa! Role para baixo para ver os resultados.")
+        else:
+            st.success(f"🎉 Análise de **{len(file_names)} arquivos** completa! Role para baixo para ver os resultados.")
 
 # Exibe resultados se a análise foi completa
 if st.session_state.get('analysis_complete', False):
@@ -249,6 +489,10 @@ if st.session_state.get('analysis_complete', False):
         bot_percentage = (total_bots / analyzer.parsed_lines * 100) if analyzer.parsed_lines > 0 else 0
         st.metric("% Tráfego de Bots", f"{bot_percentage:.1f}%")
     
+    if analyzer.dedup_filter is not None:
+        st.caption(f"🧹 {analyzer.duplicate_lines:,} linhas duplicadas foram descartadas "
+                   f"(falso positivo ≤ {analyzer.dedup_filter.error_rate:.2%})")
+    
     st.divider()
     
     # Ranking de Bots
@@ -279,18 +523,150 @@ if st.session_state.get('analysis_complete', False):
     
     st.divider()
     
-    # URLs mais acessadas
-    st.header("🔗 Top 20 URLs Mais Acessadas")
+    # Taxa de rastreio: séries calculadas uma vez ao fim da análise
+    st.header("📈 Taxa de Rastreio")
+    
+    crawl_rate = st.session_state.get('crawl_rate') or {}
+    if any(crawl_rate.values()):
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            resolution = st.radio(
+                "Resolução",
+                [name for name in CRAWL_RATE_LABELS if crawl_rate.get(name)],
+                format_func=CRAWL_RATE_LABELS.get,
+                horizontal=True
+            )
+        series = crawl_rate[resolution]
+        with col2:
+            rate_status = st.selectbox("Status", ['total'] + list(STATUS_CLASSES),
+                                       format_func=lambda x: "Todos" if x == 'total' else x)
+        with col3:
+            rate_bots = sorted(series['bots'], key=lambda bot: sum(series['bots'][bot]['total']), reverse=True)
+            rate_selected = st.multiselect("Bots", rate_bots, default=rate_bots[:5])
+        
+        if rate_selected:
+            zeros = [0] * len(series['timestamps'])
+            chart_data = {'Horário': [datetime.fromisoformat(ts) for ts in series['timestamps']]}
+            for bot in rate_selected:
+                chart_data[bot] = series['bots'][bot].get(rate_status, zeros)
+            st.line_chart(chart_data, x='Horário', y=rate_selected)
+        st.caption(f"Requisições a cada {series['bucket_minutes']:,} min, "
+                   f"de {series['start'].replace('T', ' ')} a {series['end'].replace('T', ' ')}")
+    else:
+        st.info("Nenhuma requisição de bot com data identificada no log")
+    
+    st.divider()
+    
+    # Sessões de rastreio
+    st.header("⏱️ Sessões de Rastreio")
+    
+    session_summary = analyzer.session_summary()
+    if session_summary:
+        session_data = []
+        for bot, stats in sorted(session_summary.items(), key=lambda x: x[1]['requests'], reverse=True):
+            session_data.append({
+                'Bot': bot,
+                'Sessões': stats['sessions'],
+                'Req/Sessão (média)': stats['requests_per_session']['mean'],
+                'Req/Sessão (p90)': stats['requests_per_session']['p90'],
+                'Duração média (min)': stats['duration_minutes']['mean'],
+                'Duração p90 (min)': stats['duration_minutes']['p90'],
+                'Taxa de erro': f"{stats['error_rate']:.1%}"
+            })
+        st.caption(f"Sessão = requisições do mesmo bot e IP sem pausa maior que "
+                   f"{analyzer.sessionizer.gap.total_seconds() / 60:.0f} minutos")
+        st.dataframe(session_data, use_container_width=True)
+    else:
+        st.info("Nenhuma sessão de bot identificada no log")
+    
+    st.divider()
+    
+    # IPs e faixas de rede
+    st.header("🌐 IPs e Faixas de Rede")
     
-    top_urls_data = []
-    for url, count in analyzer.url_visits.most_common(20):
-        top_urls_data.append({
-            'URL': url,
-            'Acessos': count
-        })
+    if analyzer.ip_hits:
+        ip_summary = analyzer.ip_summary()
+        st.caption(f"{ip_summary['unique_ipv4']:,} IPs IPv4 e {ip_summary['unique_ipv6']:,} IPv6 "
+                   f"em {ip_summary['unique_prefixes']:,} faixas /24 e /64")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Top IPs")
+            st.dataframe([
+                {'IP': item['ip'], 'Requisições': item['requests'],
+                 'Bots declarados': ', '.join(item['bots']) or '-'}
+                for item in ip_summary['top_ips']
+            ], use_container_width=True)
+        with col2:
+            st.subheader("Top Faixas")
+            st.dataframe([
+                {'Faixa': item['prefix'], 'Requisições': item['requests'], 'IPs': item['ips']}
+                for item in ip_summary['top_prefixes']
+            ], use_container_width=True)
+    else:
+        st.info("Nenhum IP identificado no log")
+    
+    st.divider()
     
-    if top_urls_data:
-        st.dataframe(top_urls_data, use_container_width=True)
+    # Explorador de URLs: filtro, ordenação e paginação no servidor
+    st.header("🔎 Explorador de URLs")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        explorer_bot = st.selectbox(
+            "Bot",
+            options=[None] + sorted(analyzer.bot_visits, key=analyzer.bot_visits.get, reverse=True),
+            format_func=lambda bot: bot or "Todos"
+        )
+    with col2:
+        explorer_status = st.selectbox(
+            "Status",
+            options=[None, '2', '3', '4', '5'],
+            format_func=lambda status: f"Com respostas {status}xx" if status else "Todos"
+        )
+    with col3:
+        explorer_prefix = st.text_input("Caminho começa com", placeholder="/produto/")
+    with col4:
+        explorer_sort = st.selectbox(
+            "Ordenar por",
+            options=list(URL_SORT_LABELS.keys()),
+            format_func=lambda key: URL_SORT_LABELS[key]
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        explorer_stale = st.checkbox("Só URLs obsoletas",
+                                     help="Sem rastreio há mais de 2x o p90 do intervalo de recrawl")
+    with col2:
+        explorer_ascending = st.checkbox("Ordem crescente")
+    with col3:
+        page_size = st.selectbox("Linhas por página", options=[25, 50, 100, 250], index=1)
+    
+    query = dict(bot=explorer_bot, status_class=explorer_status, prefix=explorer_prefix or None,
+                 stale=explorer_stale, sort=explorer_sort, descending=not explorer_ascending)
+    explorer_urls = analyzer.query_urls(**query)
+    pages = max(1, -(-len(explorer_urls) // page_size))
+    if st.session_state.get('explorer_page', 1) > pages:
+        st.session_state['explorer_page'] = 1
+    page = st.number_input(f"Página (de {pages:,})", min_value=1, max_value=pages, key='explorer_page')
+    
+    start = (page - 1) * page_size
+    page_rows = list(analyzer.url_rows(explorer_urls[start:start + page_size], bot=explorer_bot))
+    st.caption(f"{len(explorer_urls):,} URLs encontradas — exibindo {start + 1 if explorer_urls else 0:,} a "
+               f"{start + len(page_rows):,}")
+    if page_rows:
+        st.dataframe(page_rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("Nenhuma URL corresponde aos filtros")
+    
+    st.download_button(
+        label="⬇️ Baixar resultado filtrado (CSV)",
+        # Gerador novo a cada clique: o callable é chamado de novo em downloads repetidos
+        data=deferred_download(lambda urls=explorer_urls, bot=explorer_bot, analyzer=analyzer:
+                               rows_to_csv(analyzer.url_rows(urls, bot=bot))),
+        file_name="urls_filtradas.csv",
+        mime="text/csv",
+        disabled=not explorer_urls
+    )
     
     st.divider()
     
@@ -313,22 +689,18 @@ if st.session_state.get('analysis_complete', False):
         st.subheader("📄 Relatórios Textuais")
         
         # TXT Download
-        with open(st.session_state['txt_file'], 'r', encoding='utf-8') as f:
-            txt_content = f.read()
         st.download_button(
             label="📄 Download TXT",
-            data=txt_content,
+            data=read_result_file(st.session_state['txt_file']),
             file_name="relatorio_seo.txt",
             mime="text/plain",
             use_container_width=True
         )
         
         # JSON Download
-        with open(st.session_state['json_file'], 'r', encoding='utf-8') as f:
-            json_content = f.read()
         st.download_button(
             label="📊 Download JSON",
-            data=json_content,
+            data=read_result_file(st.session_state['json_file']),
             file_name="relatorio_seo.json",
             mime="application/json",
             use_container_width=True
@@ -338,11 +710,9 @@ if st.session_state.get('analysis_complete', False):
         st.subheader("📊 CSVs - URLs")
         
         # CSV URL Ranking
-        with open(st.session_state['csv_url_ranking'], 'r', encoding='utf-8') as f:
-            csv_ranking = f.read()
         st.download_button(
             label="📊 Ranking de URLs",
-            data=csv_ranking,
+            data=read_result_file(st.session_state['csv_url_ranking']),
             file_name="urls_ranking.csv",
             mime="text/csv",
             help="URLs com frequência de rastreio e dias desde último acesso",
@@ -350,11 +720,9 @@ if st.session_state.get('analysis_complete', False):
         )
         
         # CSV Error URLs
-        with open(st.session_state['csv_error_urls'], 'r', encoding='utf-8') as f:
-            csv_errors = f.read()
         st.download_button(
             label="⚠️ URLs com Erros",
-            data=csv_errors,
+            data=read_result_file(st.session_state['csv_error_urls']),
             file_name="urls_com_erros.csv",
             mime="text/csv",
             help="URLs com status 3xx, 4xx, 5xx para análise SEO",
@@ -365,11 +733,9 @@ if st.session_state.get('analysis_complete', False):
         st.subheader("🤖 CSVs - Bots")
         
         # CSV Googlebot
-        with open(st.session_state['csv_googlebot'], 'r', encoding='utf-8') as f:
-            csv_google = f.read()
         st.download_button(
             label="🔍 Análise Googlebot",
-            data=csv_google,
+            data=read_result_file(st.session_state['csv_googlebot']),
             file_name="analise_googlebot.csv",
             mime="text/csv",
             help="Análise detalhada do rastreamento do Googlebot",
@@ -377,16 +743,24 @@ if st.session_state.get('analysis_complete', False):
         )
         
         # CSV LLM Bots
-        with open(st.session_state['csv_llm'], 'r', encoding='utf-8') as f:
-            csv_llm_content = f.read()
         st.download_button(
             label="🤖 Comparação LLM Bots",
-            data=csv_llm_content,
+            data=read_result_file(st.session_state['csv_llm']),
             file_name="comparacao_llm_bots.csv",
             mime="text/csv",
             help="Comparativo entre GPTBot, ClaudeBot e outros LLM bots",
             use_container_width=True
         )
+        
+        # CSV Sessões
+        st.download_button(
+            label="⏱️ Sessões de Bots",
+            data=read_result_file(st.session_state['csv_sessions']),
+            file_name="sessoes_bots.csv",
+            mime="text/csv",
+            help="Requisições por sessão e duração das sessões de rastreio de cada bot",
+            use_container_width=True
+        )
     
     st.divider()
     
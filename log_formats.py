@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Formatos de log suportados pelo SEOLogAnalyzer
+Cada formato converte uma linha nos mesmos campos normalizados:
+ip, datetime, method, url, status, size, referer, user_agent
+"""
+
+import json
+import re
+from datetime import datetime
+from urllib.parse import unquote, unquote_plus
+
+# orjson é opcional: bem mais rápido para logs em JSON
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+HEX_DIGITS = '0123456789abcdefABCDEF'
+
+MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+          'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+
+def parse_clf_time(value):
+    """Converte '10/Oct/2000:13:55:36 -0700' em datetime (sem fuso, como no log)"""
+    # Caminho rápido por posição; qualquer variação cai no strptime
+    if len(value) >= 20 and value[2] == '/' and value[6] == '/' and value[11] == ':' \
+            and value[14] == ':' and value[17] == ':' and (len(value) == 20 or value[20] == ' '):
+        month = MONTHS.get(value[3:6])
+        digits = value[0:2] + value[7:11] + value[12:14] + value[15:17] + value[18:20]
+        if month and digits.isascii() and digits.isdigit():
+            return datetime(int(value[7:11]), month, int(value[0:2]),
+                            int(value[12:14]), int(value[15:17]), int(value[18:20]))
+    return datetime.strptime(value.split()[0], '%d/%b/%Y:%H:%M:%S')
+
+
+def parse_iso_time(value):
+    """Converte ISO 8601 ou epoch (s/ms) em datetime sem fuso"""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+    value = value.strip()
+    if value.replace('.', '', 1).isdigit():
+        return parse_iso_time(float(value))
+    if value.endswith('Z'):
+        value = value[:-1]
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def split_request(request):
+    """Separa 'GET /url HTTP/1.1' em (method, url)"""
+    parts = request.split()
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    return '', ''
+
+
+# Registro de formatos: nome -> classe
+LOG_FORMATS = {}
+
+
+def register_format(cls):
+    """Decorador que registra um formato para uso por nome e na detecção"""
+    LOG_FORMATS[cls.name] = cls
+    return cls
+
+
+class LogFormat:
+    """Formato de log: transforma uma linha em campos normalizados"""
+    
+    name = None
+    description = ''
+    # Linhas iniciadas por este prefixo são diretivas/comentários, não requisições
+    directive_prefix = None
+    
+    def parse(self, line):
+        """Retorna dict com os campos normalizados ou None se a linha não casa"""
+        raise NotImplementedError
+    
+    def timestamp(self, line):
+        """Extrai só o datetime da linha (usado na busca binária por janela)"""
+        data = self.parse(line)
+        return data['datetime'] if data else None
+    
+    def directive(self, line):
+        """Processa uma linha de diretiva (ex: #Fields:)"""
+
+
+@register_format
+class CombinedFormat(LogFormat):
+    """Apache/Nginx Common e Combined"""
+    
+    name = 'combined'
+    description = 'Apache/Nginx Common/Combined'
+    
+    pattern = re.compile(
+        r'(?P<ip>[\d\.]+|[0-9A-Fa-f]*:[0-9A-Fa-f:\.]*)\s+'  # IPv4 ou IPv6
+        r'(?P<identity>-|\S+)\s+'
+        r'(?P<user>-|\S+)\s+'
+        r'\[(?P<time>[^\]]+)\]\s+'
+        r'"(?P<request>[^"]*)"\s+'
+        r'(?P<status>\d{3})\s+'
+        r'(?P<size>-|\d+)\s*'
+        r'(?:"(?P<referer>[^"]*)")?\s*'
+        r'(?:"(?P<user_agent>[^"]*)")?'
+    )
+    time_pattern = re.compile(r'\[([^\]\s]+)')
+    
+    def __init__(self):
+        # Linhas consecutivas costumam repetir o mesmo segundo
+        self._last_time = None
+        self._last_datetime = None
+    
+    def parse(self, line):
+        data = self.parse_fields(line)
+        if data is None:
+            data = self.parse_regex(line)
+            if data is None:
+                return None
+        
+        data['method'], data['url'] = split_request(data['request'])
+        time_str = data['time']
+        if time_str == self._last_time:
+            data['datetime'] = self._last_datetime
+        else:
+            try:
+                data['datetime'] = parse_clf_time(time_str)
+            except (ValueError, IndexError):
+                data['datetime'] = None
+            self._last_time = time_str
+            self._last_datetime = data['datetime']
+        return data
+    
+    def parse_regex(self, line):
+        """Parse genérico pela regex (linhas fora do layout padrão)"""
+        match = self.pattern.match(line)
+        return match.groupdict() if match else None
+    
+    def parse_fields(self, line):
+        """Parse posicional por split nas aspas para o layout padrão
+        
+        'IP IDENT USER [TIME] "REQUEST" STATUS SIZE "REFERER" "UA"' com um
+        espaço entre campos. Retorna None em qualquer desvio desse layout
+        para que a linha seja decidida pela regex.
+        """
+        parts = line.split('"')
+        count = len(parts)
+        if count < 3:
+            return None
+        
+        # 'IP IDENT USER [TIME] '
+        head = parts[0]
+        if not head.endswith('] ') or not head.isprintable():
+            return None
+        fields = head.split(' ', 3)
+        if len(fields) != 4:
+            return None
+        ip, identity, user, time_str = fields
+        if not ip or not identity or not user:
+            return None
+        if ip.strip('0123456789.'):
+            # IPv6: só hexadecimais antes do primeiro ':'
+            prefix, colon, rest = ip.partition(':')
+            if not colon or prefix.strip(HEX_DIGITS) or rest.strip(HEX_DIGITS + ':.'):
+                return None
+        time_str = time_str[1:-2]
+        if not time_str or fields[3][0] != '[' or ']' in time_str:
+            return None
+        
+        # ' STATUS SIZE ' (sem o espaço final quando não há referer)
+        middle = parts[2]
+        status = middle[1:4]
+        if middle[:1] != ' ' or middle[4:5] != ' ' or not (status.isascii() and status.isdigit()):
+            return None
+        if count == 3:
+            size = middle[5:]
+            referer = user_agent = None
+        elif count == 5 and not parts[4] or count >= 7 and parts[4] == ' ':
+            if middle[-1] != ' ':
+                return None
+            size = middle[5:-1]
+            referer = parts[3]
+            user_agent = parts[5] if count >= 7 else None
+        else:
+            return None
+        if size != '-' and not (size.isascii() and size.isdigit()):
+            return None
+        
+        return {
+            'ip': ip,
+            'identity': identity,
+            'user': user,
+            'time': time_str,
+            'request': parts[1],
+            'status': status,
+            'size': size,
+            'referer': referer,
+            'user_agent': user_agent,
+        }
+    
+    def timestamp(self, line):
+        match = self.time_pattern.search(line)
+        if not match:
+            return None
+        try:
+            return parse_clf_time(match.group(1))
+        except ValueError:
+            return None
+
+
+class DelimitedFormat(LogFormat):
+    """Formatos delimitados com cabeçalho '#Fields:' (W3C/IIS, CloudFront...)
+    
+    Os campos são localizados por posição com str.split; os nomes do
+    cabeçalho são mapeados para os campos normalizados por FIELD_ALIASES.
+    """
+    
+    delimiter = None
+    directive_prefix = '#'
+    default_fields = ()
+    
+    FIELD_ALIASES = {
+        'c-ip': 'ip', 'client_ip': 'ip', 'clientip': 'ip',
+        'date': 'date', 'time': 'time', 'timestamp': 'timestamp',
+        'cs-method': 'method', 'request_method': 'method',
+        'cs-uri-stem': 'url', 'url': 'url', 'path': 'url',
+        'cs-uri-query': 'query', 'query': 'query',
+        'sc-status': 'status', 'status': 'status',
+        'sc-bytes': 'size', 'bytes': 'size',
+        'cs(referer)': 'referer', 'cs(referrer)': 'referer', 'referer': 'referer',
+        'cs(user-agent)': 'user_agent', 'user_agent': 'user_agent', 'useragent': 'user_agent',
+    }
+    
+    def __init__(self, fields=None):
+        self.set_fields(fields or self.default_fields)
+    
+    def set_fields(self, fields):
+        self.fields = list(fields)
+        self.positions = {}
+        for index, field in enumerate(self.fields):
+            key = self.FIELD_ALIASES.get(field.lower())
+            if key and key not in self.positions:
+                self.positions[key] = index
+        self.min_fields = max(self.positions.values()) + 1 if self.positions else 0
+        self.required = 'url' in self.positions and 'status' in self.positions
+    
+    def directive(self, line):
+        if line.startswith('#Fields:'):
+            self.set_fields(line[len('#Fields:'):].split())
+    
+    def decode_agent(self, value):
+        return value
+    
+    def parse(self, line):
+        values = line.split(self.delimiter)
+        if len(values) < self.min_fields or not self.required:
+            return None
+        
+        data = {}
+        for key, index in self.positions.items():
+            value = values[index]
+            data[key] = None if value == '-' else value
+        
+        status = data.get('status')
+        if not status or not status.isdigit():
+            return None
+        
+        url = data.get('url') or ''
+        query = data.pop('query', None)
+        data['url'] = f"{url}?{query}" if query else url
+        data['method'] = data.get('method') or ''
+        
+        try:
+            if 'timestamp' in data:
+                data['datetime'] = parse_iso_time(data.pop('timestamp'))
+            else:
+                data['datetime'] = datetime.strptime(f"{data['date']} {data['time']}",
+                                                     '%Y-%m-%d %H:%M:%S')
+        except (KeyError, TypeError, ValueError):
+            data['datetime'] = None
+        
+        if data.get('user_agent'):
+            data['user_agent'] = self.decode_agent(data['user_agent'])
+        return data
+
+
+@register_format
+class W3CFormat(DelimitedFormat):
+    """IIS W3C Extended (campos separados por espaço, UA com '+')"""
+    
+    name = 'w3c'
+    description = 'IIS W3C Extended'
+    delimiter = ' '
+    default_fields = ('date', 'time', 's-ip', 'cs-method', 'cs-uri-stem', 'cs-uri-query',
+                      's-port', 'cs-username', 'c-ip', 'cs(User-Agent)', 'cs(Referer)',
+                      'sc-status', 'sc-substatus', 'sc-win32-status', 'time-taken')
+    
+    def decode_agent(self, value):
+        return unquote_plus(value)
+
+
+@register_format
+class CloudFrontFormat(DelimitedFormat):
+    """CDN em TSV (CloudFront standard logs e exportações no mesmo estilo)"""
+    
+    name = 'cloudfront'
+    description = 'CloudFront/CDN TSV'
+    delimiter = '\t'
+    default_fields = ('date', 'time', 'x-edge-location', 'sc-bytes', 'c-ip', 'cs-method',
+                      'cs(Host)', 'cs-uri-stem', 'sc-status', 'cs(Referer)', 'cs(User-Agent)',
+                      'cs-uri-query', 'cs(Cookie)', 'x-edge-result-type', 'x-edge-request-id',
+                      'x-host-header', 'cs-protocol', 'cs-bytes', 'time-taken')
+    
+    def decode_agent(self, value):
+        # CloudFront codifica o UA duas vezes (%2520 -> %20 -> ' ')
+        return unquote(unquote(value))
+
+
+@register_format
+class JSONFormat(LogFormat):
+    """Uma requisição por linha em JSON (ex: Nginx com escape=json)"""
+    
+    name = 'json'
+    description = 'JSON por linha (Nginx/CDN)'
+    
+    # Primeira chave presente vence
+    KEYS = {
+        'ip': ('remote_addr', 'client_ip', 'ip', 'c-ip', 'clientIP'),
+        'time': ('time_local', 'time_iso8601', '@timestamp', 'timestamp', 'time', 'msec'),
+        'request': ('request',),
+        'method': ('request_method', 'method'),
+        'url': ('request_uri', 'uri', 'url', 'path'),
+        'status': ('status', 'status_code', 'response_status'),
+        'size': ('body_bytes_sent', 'bytes_sent', 'bytes', 'size'),
+        'referer': ('http_referer', 'referer', 'referrer'),
+        'user_agent': ('http_user_agent', 'user_agent', 'userAgent', 'ua'),
+    }
+    
+    def _first(self, record, key):
+        """Primeiro valor escalar presente, como str (objetos e listas são ignorados)"""
+        for name in self.KEYS[key]:
+            value = record.get(name)
+            if isinstance(value, (dict, list)) or value in (None, '', '-'):
+                continue
+            return value if isinstance(value, str) else str(value)
+        return None
+    
+    def parse(self, line):
+        if not line.startswith('{'):
+            return None
+        try:
+            record = json_loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+        
+        status = self._first(record, 'status')
+        if status is None:
+            return None
+        
+        method = self._first(record, 'method') or ''
+        url = self._first(record, 'url')
+        request = self._first(record, 'request')
+        if request and (url is None or not method):
+            request_method, request_url = split_request(request)
+            method = method or request_method
+            url = url or request_url
+        
+        moment = None
+        value = self._first(record, 'time')
+        if value is not None:
+            try:
+                if '/' in value:
+                    moment = parse_clf_time(value)
+                else:
+                    moment = parse_iso_time(value)
+            except (ValueError, TypeError, AttributeError, IndexError, OverflowError, OSError):
+                moment = None
+        
+        size = self._first(record, 'size')
+        return {
+            'ip': self._first(record, 'ip'),
+            'method': method,
+            'url': url or '',
+            'status': status,
+            'size': size,
+            'referer': self._first(record, 'referer'),
+            'user_agent': self._first(record, 'user_agent'),
+            'datetime': moment,
+        }
+
+
+class NginxFormat(LogFormat):
+    """Formato compilado a partir de uma diretiva log_format do Nginx
+    
+    Ex: NginxFormat('$remote_addr - $remote_user [$time_local] "$request" '
+                    '$status $body_bytes_sent "$http_referer" "$http_user_agent"')
+    """
+    
+    name = 'nginx'
+    description = 'log_format customizado do Nginx'
+    
+    VARIABLES = {
+        'remote_addr': 'ip', 'http_x_forwarded_for': 'forwarded_for',
+        'time_local': 'time', 'time_iso8601': 'time_iso', 'msec': 'time_iso',
+        'request': 'request', 'request_method': 'method', 'request_uri': 'url', 'uri': 'path',
+        'args': 'query', 'status': 'status', 'body_bytes_sent': 'size', 'bytes_sent': 'size',
+        'http_referer': 'referer', 'http_user_agent': 'user_agent',
+    }
+    variable_pattern = re.compile(r'\$(\w+)|\$\{(\w+)\}')
+    
+    def __init__(self, log_format):
+        self.log_format = log_format
+        self.pattern = self.compile(log_format)
+    
+    def compile(self, log_format):
+        """Converte o log_format numa regex com grupos nomeados"""
+        parts = []
+        position = 0
+        seen = set()
+        for token in self.variable_pattern.finditer(log_format):
+            parts.append(re.escape(log_format[position:token.start()]))
+            variable = token.group(1) or token.group(2)
+            position = token.end()
+            
+            # O valor vai até o próximo caractere literal
+            next_literal = log_format[position:position + 1]
+            if not next_literal:
+                value = '.*'
+            elif next_literal == '$':
+                value = r'\S*'
+            else:
+                value = f"[^{re.escape(next_literal)}]*"
+            
+            group = self.VARIABLES.get(variable)
+            if group and group not in seen:
+                seen.add(group)
+                parts.append(f"(?P<{group}>{value})")
+            else:
+                parts.append(value)
+        parts.append(re.escape(log_format[position:]))
+        return re.compile(''.join(parts))
+    
+    def parse(self, line):
+        match = self.pattern.match(line)
+        if not match:
+            return None
+        data = match.groupdict()
+        
+        status = data.get('status')
+        if not status or not status.isdigit():
+            return None
+        
+        method = data.get('method') or ''
+        url = data.get('url')
+        if url is None and data.get('path') is not None:
+            url = data['path'] + (f"?{data['query']}" if data.get('query') else '')
+        if data.get('request') and (url is None or not method):
+            request_method, request_url = split_request(data['request'])
+            method = method or request_method
+            url = url or request_url
+        
+        try:
+            if data.get('time'):
+                moment = parse_clf_time(data['time'])
+            elif data.get('time_iso'):
+                moment = parse_iso_time(data['time_iso'])
+            else:
+                moment = None
+        except (ValueError, IndexError, OverflowError, OSError):
+            moment = None
+        
+        data.update(method=method, url=url or '', datetime=moment)
+        for key in ('referer', 'user_agent', 'size'):
+            if data.get(key) == '-':
+                data[key] = None
+        return data
+
+
+def get_format(spec):
+    """Resolve um formato por instância, nome registrado ou string log_format do Nginx"""
+    if isinstance(spec, LogFormat):
+        return spec
+    if spec in LOG_FORMATS:
+        return LOG_FORMATS[spec]()
+    if isinstance(spec, str) and '$' in spec:
+        return NginxFormat(spec)
+    raise ValueError(f"Formato de log desconhecido: {spec!r} "
+                     f"(use {', '.join(LOG_FORMATS)} ou um log_format do Nginx)")
+
+
+def detect_format(lines, candidates=None):
+    """Escolhe o formato que parseia a maior fração das linhas de amostra.
+    
+    Em caso de empate vence a ordem de registro (combined primeiro).
+    """
+    candidates = [get_format(c) for c in (candidates or LOG_FORMATS)]
+    best, best_score = candidates[0], 0.0
+    
+    for log_format in candidates:
+        parsed = total = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if log_format.directive_prefix and line.startswith(log_format.directive_prefix):
+                log_format.directive(line)
+                continue
+            total += 1
+            if log_format.parse(line):
+                parsed += 1
+        score = parsed / total if total else 0.0
+        if score > best_score:
+            best, best_score = log_format, score
+    
+    return best
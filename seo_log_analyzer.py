@@ -5,21 +5,826 @@ SEO Log Analyzer
 Analisa logs de acesso web com foco em métricas de SEO
 """
 
+import copy
+import gzip
+import hashlib
+import heapq
+import ipaddress
+import math
 import re
-from collections import defaultdict, Counter
-from datetime import datetime
+import socket
+import sys
+import time
+import tracemalloc
+import zlib
+from array import array
+from collections import defaultdict, Counter, namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 import json
 
+from log_formats import LOG_FORMATS, CombinedFormat, get_format, detect_format
+
+
+# Padrões de bots conhecidos; identify_bot retorna o primeiro que casar, então
+# as variantes específicas vêm antes do padrão genérico que também as casaria
+BOT_PATTERNS = {
+    'Googlebot-Image': re.compile(r'Googlebot-Image', re.IGNORECASE),
+    'Googlebot-News': re.compile(r'Googlebot-News', re.IGNORECASE),
+    'Googlebot-Video': re.compile(r'Googlebot-Video', re.IGNORECASE),
+    'Googlebot': re.compile(r'Googlebot', re.IGNORECASE),
+    'Google-InspectionTool': re.compile(r'Google-InspectionTool', re.IGNORECASE),
+    'GPTBot': re.compile(r'GPTBot', re.IGNORECASE),
+    'ChatGPT-User': re.compile(r'ChatGPT-User', re.IGNORECASE),
+    'Bingbot': re.compile(r'bingbot', re.IGNORECASE),
+    'YandexBot': re.compile(r'YandexBot', re.IGNORECASE),
+    'Baiduspider': re.compile(r'Baiduspider', re.IGNORECASE),
+    'DuckDuckBot': re.compile(r'DuckDuckBot', re.IGNORECASE),
+    'Slurp': re.compile(r'Slurp', re.IGNORECASE),  # Yahoo
+    'facebookexternalhit': re.compile(r'facebookexternalhit', re.IGNORECASE),
+    'LinkedInBot': re.compile(r'LinkedInBot', re.IGNORECASE),
+    'Twitterbot': re.compile(r'Twitterbot', re.IGNORECASE),
+    'Applebot': re.compile(r'Applebot', re.IGNORECASE),
+    'AhrefsBot': re.compile(r'AhrefsBot', re.IGNORECASE),
+    'SemrushBot': re.compile(r'SemrushBot', re.IGNORECASE),
+    'MJ12bot': re.compile(r'MJ12bot', re.IGNORECASE),
+    'DotBot': re.compile(r'DotBot', re.IGNORECASE),
+    'PetalBot': re.compile(r'PetalBot', re.IGNORECASE),
+    'ClaudeBot': re.compile(r'ClaudeBot', re.IGNORECASE),
+}
+
+# Grupos de bots usados nos relatórios
+LLM_BOTS = ['GPTBot', 'ChatGPT-User', 'ClaudeBot']
+SEARCH_BOTS = ['Googlebot', 'Googlebot-Image', 'Googlebot-News', 
+               'Googlebot-Video', 'Google-InspectionTool', 'Bingbot', 
+               'YandexBot', 'Baiduspider', 'DuckDuckBot', 'Applebot']
+GOOGLE_BOTS = ['Googlebot', 'Googlebot-Image', 'Googlebot-News', 
+               'Googlebot-Video', 'Google-InspectionTool']
+
+# Progresso reportado por SEOLogAnalyzer.analyze(progress_callback=...)
+AnalysisProgress = namedtuple('AnalysisProgress', [
+    'lines',           # linhas lidas até agora
+    'bytes_read',      # bytes lidos (granularidade do buffer de leitura)
+    'total_bytes',     # bytes a ler (tamanho do arquivo menos o trecho pulado)
+    'elapsed',         # segundos desde o início
+    'lines_per_sec',
+    'bytes_per_sec',
+    'eta',             # segundos restantes estimados (None se desconhecido)
+    'fraction',        # fração concluída entre 0 e 1
+])
+
+# Modos de agrupamento de URLs nos relatórios
+URL_MODES = ('raw', 'canonical', 'template')
+
+# Versão do formato de SEOLogAnalyzer.save_snapshot()
+SNAPSHOT_VERSION = 1
+
+# Ordenações aceitas por SEOLogAnalyzer.query_urls()
+URL_SORT_KEYS = ('crawls', 'last_crawl', 'first_crawl', 'bots', 'url')
+
+# Classes de status das séries de taxa de rastreio (a última recebe 1xx e inválidos)
+STATUS_CLASSES = ('2xx', '3xx', '4xx', '5xx', 'outros')
+STATUS_CLASS_INDEX = {'2': 0, '3': 1, '4': 2, '5': 3}
+
+# Resoluções das séries de taxa de rastreio: (nome, minutos por bucket, buckets retidos)
+CRAWL_RATE_RESOLUTIONS = (
+    ('minute', 1, 24 * 60),   # últimas 24 horas
+    ('hour', 60, 31 * 24),    # últimos 31 dias
+    ('day', 24 * 60, 400),    # último ano e pouco
+)
+
+
+class URLCanonicalizer:
+    """Normaliza URLs para reduzir a cardinalidade dos relatórios"""
+    
+    # Parâmetros de rastreamento removidos por padrão ('*' casa com prefixo)
+    DEFAULT_STRIP_PARAMS = ('utm_*', 'gclid', 'fbclid', 'msclkid', 'dclid',
+                            'yclid', '_ga', '_gl', 'mc_cid', 'mc_eid')
+    
+    # Regras automáticas aplicadas a cada segmento do path
+    DEFAULT_SEGMENT_RULES = (
+        (re.compile(r'^\d+$'), '{id}'),
+        (re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                    r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'), '{uuid}'),
+        (re.compile(r'^[0-9a-fA-F]{16,}$'), '{hash}'),
+    )
+    
+    def __init__(self, strip_params=None, strip_query=False, sort_params=True,
+                 lowercase_path=False, lowercase_params=True, templates=None,
+                 segment_rules=None, cache_size=100000):
+        patterns = self.DEFAULT_STRIP_PARAMS if strip_params is None else strip_params
+        self.strip_exact = {p.lower() for p in patterns if not p.endswith('*')}
+        self.strip_prefixes = tuple(p[:-1].lower() for p in patterns if p.endswith('*'))
+        self.strip_query = strip_query
+        self.sort_params = sort_params
+        self.lowercase_path = lowercase_path
+        self.lowercase_params = lowercase_params
+        self.segment_rules = self.DEFAULT_SEGMENT_RULES if segment_rules is None else segment_rules
+        
+        # Trie de templates: segmento literal -> nó, '*' -> placeholder
+        self.template_trie = {}
+        for template in templates or []:
+            self.add_template(template)
+        
+        # Cache URL bruta -> (canônica, template)
+        self.cache_size = cache_size
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def add_template(self, template):
+        """Registra um template explícito, ex: '/produto/{id}'"""
+        if self.lowercase_path:
+            template = template.lower()
+        node = self.template_trie
+        for segment in template.strip('/').split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                node = node.setdefault('*', {})
+            else:
+                node = node.setdefault(segment, {})
+        node['$'] = template
+    
+    def _strip_param(self, name):
+        name = name.lower()
+        return name in self.strip_exact or name.startswith(self.strip_prefixes)
+    
+    def _canonical(self, url):
+        # O fragmento vem depois da query: '/p#x?y' não tem query
+        path, _, query = url.partition('#')[0].partition('?')
+        if self.lowercase_path:
+            path = path.lower()
+        
+        if query and not self.strip_query:
+            params = []
+            for param in query.split('&'):
+                if not param:
+                    continue
+                name, sep, value = param.partition('=')
+                if self._strip_param(name):
+                    continue
+                if self.lowercase_params:
+                    name = name.lower()
+                params.append(name + sep + value)
+            if self.sort_params:
+                params.sort()
+            if params:
+                return path + '?' + '&'.join(params), path
+        return path, path
+    
+    def _match_trie(self, segments):
+        node = self.template_trie
+        for segment in segments:
+            if segment in node:
+                node = node[segment]
+            elif '*' in node:
+                node = node['*']
+            else:
+                return None
+        return node.get('$')
+    
+    def _template(self, path):
+        segments = path.strip('/').split('/')
+        template = self._match_trie(segments) if self.template_trie else None
+        if template:
+            template = template.rstrip('/') or '/'
+        else:
+            templated = []
+            for segment in segments:
+                for pattern, placeholder in self.segment_rules:
+                    if pattern.match(segment):
+                        segment = placeholder
+                        break
+                templated.append(segment)
+            template = '/' + '/'.join(templated) if path.startswith('/') else '/'.join(templated)
+        
+        # Barra final como na URL canônica, que também distingue '/p/1/' de '/p/1'
+        if path.endswith('/') and not template.endswith('/'):
+            template += '/'
+        return template
+    
+    def resolve(self, url):
+        """Retorna (URL canônica, template) usando o cache"""
+        cached = self._cache.get(url)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        
+        self.cache_misses += 1
+        canonical, path = self._canonical(url)
+        result = (canonical, self._template(path))
+        
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[url] = result
+        return result
+    
+    def canonicalize(self, url):
+        """Retorna a URL canônica"""
+        return self.resolve(url)[0]
+    
+    def template(self, url):
+        """Retorna o template da URL, ex: '/produto/{id}'"""
+        return self.resolve(url)[1]
+
+
+class QuantileSketch:
+    """Sketch de quantis com erro relativo limitado e mesclável.
+    
+    Valores positivos caem em buckets logarítmicos (estilo DDSketch); quando
+    o número de buckets passa de max_buckets os menores são agregados.
+    """
+    
+    __slots__ = ('gamma', 'log_gamma', 'max_buckets', 'buckets', 'zero_count', 'count')
+    
+    def __init__(self, relative_accuracy=0.05, max_buckets=64):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+    
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+    
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(key) for key in keys[:excess])
+        self.buckets[keys[excess]] += merged
+    
+    def merge(self, other):
+        """Incorpora outro sketch com a mesma precisão"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+    
+    def quantile(self, q):
+        """Retorna o quantil q (0 a 1) aproximado, ou None se vazio"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class IntervalStats:
+    """Estatísticas online dos intervalos entre rastreios (memória constante).
+    
+    Os primeiros SKETCH_AFTER valores ficam num array e dão quantis exatos; o
+    QuantileSketch só é criado depois disso, poupando memória nas muitas URLs
+    rastreadas poucas vezes.
+    """
+    
+    SKETCH_AFTER = 16
+    
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'samples', 'sketch')
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.samples = None
+        self.sketch = None
+    
+    def add(self, seconds):
+        # Média e variância de Welford
+        self.count += 1
+        delta = seconds - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (seconds - self.mean)
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self._add_sample(seconds)
+    
+    def _add_sample(self, seconds):
+        if self.sketch is not None:
+            self.sketch.add(seconds)
+        elif self.samples is None:
+            self.samples = array('d', (seconds,))
+        elif len(self.samples) < self.SKETCH_AFTER:
+            self.samples.append(seconds)
+        else:
+            self.sketch = QuantileSketch()
+            for value in self.samples:
+                self.sketch.add(value)
+            self.sketch.add(seconds)
+            self.samples = None
+    
+    def _merge_samples(self, other):
+        if other.sketch is None:
+            for value in other.samples or ():
+                self._add_sample(value)
+            return
+        if self.sketch is None:
+            self.sketch = QuantileSketch()
+            for value in self.samples or ():
+                self.sketch.add(value)
+            self.samples = None
+        self.sketch.merge(other.sketch)
+    
+    def merge(self, other):
+        """Combina estatísticas (algoritmo paralelo de Chan)"""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            self._merge_samples(other)
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._merge_samples(other)
+    
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    def quantile(self, q):
+        if self.sketch is not None:
+            return self.sketch.quantile(q)
+        if not self.samples:
+            return None
+        # Mesmo posto do QuantileSketch.quantile, sobre os valores exatos
+        return sorted(self.samples)[int(q * (len(self.samples) - 1))]
+
+
+class SessionStats:
+    """Agregados das sessões já encerradas de um bot"""
+    
+    __slots__ = ('requests', 'durations', 'error_requests')
+    
+    def __init__(self):
+        self.requests = IntervalStats()   # requisições por sessão
+        self.durations = IntervalStats()  # duração da sessão em segundos
+        self.error_requests = 0
+    
+    def add(self, requests, duration, errors):
+        self.requests.add(requests)
+        self.durations.add(duration)
+        self.error_requests += errors
+    
+    def merge(self, other):
+        self.requests.merge(other.requests)
+        self.durations.merge(other.durations)
+        self.error_requests += other.error_requests
+
+
+class BotSessionizer:
+    """Reconstrói sessões de rastreio por (bot, IP) em streaming.
+    
+    Uma sessão termina quando o bot fica mais de gap sem requisições naquele
+    IP. As sessões abertas ficam num heap ordenado pelo vencimento, com
+    remoção preguiçosa (entradas de sessões estendidas ou substituídas são
+    revalidadas ao chegar ao topo), e ao fechar viram agregados por bot: a
+    memória depende das sessões simultâneas, não do total de requisições.
+    """
+    
+    def __init__(self, gap=timedelta(minutes=30)):
+        self.gap = gap
+        self.active = {}     # (bot, ip) -> [início, última requisição, requisições, erros]
+        self.expiry = []     # heap de (vencimento, seq, sessão, chave)
+        self.closed = defaultdict(SessionStats)
+        self.latest = None
+        self.peak_active = 0
+        self._seq = 0
+    
+    def add(self, bot, ip, timestamp, error=False):
+        """Registra uma requisição do bot"""
+        if self.latest is None or timestamp > self.latest:
+            self.latest = timestamp
+            self.expire(timestamp)
+        
+        key = (bot, ip)
+        session = self.active.get(key)
+        if session is not None and timestamp - session[1] > self.gap:
+            self._close(key, session)
+            session = None
+        if session is None:
+            session = self.active[key] = [timestamp, timestamp, 0, 0]
+            self._seq += 1
+            heapq.heappush(self.expiry, (timestamp + self.gap, self._seq, session, key))
+            self.peak_active = max(self.peak_active, len(self.active))
+        elif timestamp > session[1]:
+            session[1] = timestamp
+        elif timestamp < session[0]:
+            session[0] = timestamp
+        session[2] += 1
+        if error:
+            session[3] += 1
+    
+    def expire(self, now):
+        """Encerra as sessões sem requisições há mais de gap em relação a now"""
+        expiry = self.expiry
+        while expiry and expiry[0][0] < now:
+            _, seq, session, key = heapq.heappop(expiry)
+            if self.active.get(key) is not session:
+                continue  # sessão já encerrada
+            deadline = session[1] + self.gap
+            if deadline < now:
+                self._close(key, session)
+            else:
+                heapq.heappush(expiry, (deadline, seq, session, key))
+    
+    def _close(self, key, session):
+        del self.active[key]
+        start, last, requests, errors = session
+        self.closed[key[0]].add(requests, (last - start).total_seconds(), errors)
+    
+    def stats(self):
+        """Agregados por bot incluindo as sessões ainda abertas (sem encerrá-las)"""
+        result = defaultdict(SessionStats)
+        for bot, stats in self.closed.items():
+            result[bot].merge(stats)
+        for (bot, _), (start, last, requests, errors) in self.active.items():
+            result[bot].add(requests, (last - start).total_seconds(), errors)
+        return result
+
+
+class CrawlRateRing:
+    """Requisições por bot e classe de status em buckets de tempo de tamanho fixo.
+    
+    Cada bot tem um array pré-alocado de size buckets x classes de status,
+    indexado por bucket % size. Quando o bucket mais recente avança, os slots
+    reaproveitados são zerados em todos os bots; requisições mais antigas que
+    a janela são apenas contadas em dropped.
+    """
+    
+    def __init__(self, step, size):
+        self.step = step  # minutos por bucket
+        self.size = size
+        self.width = len(STATUS_CLASSES)
+        self.bots = {}    # bot -> array('I') com size * width contadores
+        self.head = None  # bucket mais recente
+        self.first = None  # bucket mais antigo ainda na janela
+        self.dropped = 0
+        self._blank = array('I', bytes(4 * size * self.width))
+        self._blank_row = array('I', bytes(4 * self.width))
+    
+    def add(self, bot, minute, status_class):
+        """Conta uma requisição no bucket do minuto (minutos desde 0001-01-01)"""
+        bucket = minute // self.step
+        if bucket != self.head and not self._place(bucket):
+            return
+        counts = self.bots.get(bot)
+        if counts is None:
+            counts = self.bots[bot] = array('I', self._blank)
+        counts[bucket % self.size * self.width + status_class] += 1
+    
+    def _place(self, bucket):
+        """Ajusta a janela para um bucket diferente do mais recente (False se já saiu dela)"""
+        head = self.head
+        if head is None:
+            self.head = self.first = bucket
+        elif bucket > head:
+            self._advance(head, bucket)
+        elif bucket <= head - self.size:
+            self.dropped += 1
+            return False
+        elif bucket < self.first:
+            self.first = bucket
+        return True
+    
+    def _advance(self, head, bucket):
+        if bucket - head >= self.size:
+            for counts in self.bots.values():
+                counts[:] = self._blank
+        else:
+            width = self.width
+            for b in range(head + 1, bucket + 1):
+                start = b % self.size * width
+                for counts in self.bots.values():
+                    counts[start:start + width] = self._blank_row
+        self.head = bucket
+        self.first = max(self.first, bucket - self.size + 1)
+    
+    def bucket_datetime(self, bucket):
+        minute = bucket * self.step
+        return datetime.fromordinal(minute // 1440) + timedelta(minutes=minute % 1440)
+    
+    def export(self, max_points=500):
+        """Séries da janela retida, somando buckets vizinhos se passar de max_points"""
+        if self.head is None:
+            return None
+        start, end = self.first, self.head
+        factor = -(-(end - start + 1) // max_points)
+        points = -(-(end - start + 1) // factor)
+        width = self.width
+        
+        bots = {}
+        for bot, counts in self.bots.items():
+            series = [[0] * points for _ in range(width)]
+            for b in range(start, end + 1):
+                base = b % self.size * width
+                point = (b - start) // factor
+                for column in range(width):
+                    series[column][point] += counts[base + column]
+            totals = [sum(values) for values in zip(*series)]
+            if not any(totals):
+                continue
+            bots[bot] = {'total': totals}
+            for name, values in zip(STATUS_CLASSES, series):
+                if any(values):
+                    bots[bot][name] = values
+        
+        return {
+            'bucket_minutes': self.step * factor,
+            'start': self.bucket_datetime(start).isoformat(),
+            'end': self.bucket_datetime(end).isoformat(),
+            'timestamps': [self.bucket_datetime(start + i * factor).isoformat() for i in range(points)],
+            'dropped': self.dropped,
+            'bots': bots
+        }
+
+
+def _sizing_weight(obj):
+    return 1 + len(obj) if isinstance(obj, (dict, list, tuple, set, frozenset)) else 1
+
+
+def deep_sizeof(obj, sample=100, _seen=None):
+    """Tamanho aproximado em bytes de obj e de tudo o que ele referencia.
+    
+    Em containers com mais de sample itens só uma amostra espaçada é medida
+    e extrapolada para o total, proporcionalmente ao tamanho dos itens
+    internos (listas de tamanhos muito diferentes não distorcem a média).
+    Objetos já contados (a mesma string em duas chaves, por exemplo) entram
+    uma vez só.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    
+    if isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        children = obj
+    elif hasattr(obj, '__dict__') or hasattr(obj, '__slots__'):
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), sample, seen)
+        for name in getattr(type(obj), '__slots__', ()):
+            size += deep_sizeof(getattr(obj, name, None), sample, seen)
+        return size
+    else:
+        return size
+    
+    count = len(children)
+    if count <= sample:
+        keys = obj.keys() if children is not obj else ()
+        return size + sum(deep_sizeof(child, sample, seen) for child in (*keys, *children))
+    
+    step = count // sample
+    measured_size = 0
+    measured_weight = 0
+    if children is obj:
+        for child in islice(children, 0, None, step):
+            measured_size += deep_sizeof(child, sample, seen)
+            measured_weight += _sizing_weight(child)
+    else:
+        for key, value in islice(obj.items(), 0, None, step):
+            measured_size += deep_sizeof(key, sample, seen) + deep_sizeof(value, sample, seen)
+            measured_weight += _sizing_weight(value)
+    total_weight = sum(map(_sizing_weight, children))
+    return size + measured_size * total_weight // measured_weight
+
+
+# Chaves inteiras de IP: IPv4 ocupa 0..2**32-1 e IPv6 leva este bit a mais,
+# então as duas famílias convivem nos mesmos dicionários sem colisão
+IPV6_FLAG = 1 << 128
+
+
+def pack_ip(ip):
+    """Converte um IP em texto na chave inteira (None se não for um IP)"""
+    if not ip:
+        return None
+    try:
+        if ':' in ip:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+            # IPv4 mapeado (::ffff:a.b.c.d, comum em servidores dual-stack) conta como IPv4
+            if value >> 32 == 0xFFFF:
+                return value & 0xFFFFFFFF
+            return IPV6_FLAG | value
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, ValueError):
+        return None
+
+
+def unpack_ip(key):
+    """Converte a chave inteira de volta em IPv4Address/IPv6Address"""
+    if key & IPV6_FLAG:
+        return ipaddress.IPv6Address(key ^ IPV6_FLAG)
+    return ipaddress.IPv4Address(key)
+
+
+def ip_prefix(key, v4_bits=24, v6_bits=64):
+    """Chave da faixa de rede do IP (/24 no IPv4, /64 no IPv6 por padrão)"""
+    if key & IPV6_FLAG:
+        return key >> (128 - v6_bits) << (128 - v6_bits) | IPV6_FLAG
+    return key >> (32 - v4_bits) << (32 - v4_bits)
+
+
+def format_prefix(key, v4_bits=24, v6_bits=64):
+    """Formata uma chave de faixa como '66.249.66.0/24' ou '2001:db8::/64'"""
+    return f"{unpack_ip(key)}/{v6_bits if key & IPV6_FLAG else v4_bits}"
+
+
+def line_fingerprint(line):
+    """Hash de 64 bits de uma linha bruta (usado na deduplicação)"""
+    digest = hashlib.blake2b(line.encode('utf-8', errors='surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class BloomFilter:
+    """Filtro de Bloom de capacidade fixa sobre fingerprints de 64 bits"""
+    
+    __slots__ = ('capacity', 'error_rate', 'size', 'hashes', 'bits', 'count')
+    
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Tamanho e número de hashes ótimos para a taxa de falso positivo
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, fingerprint):
+        # Hashing duplo (Kirsch-Mitzenmacher) a partir das duas metades
+        h1 = fingerprint & 0xFFFFFFFF
+        h2 = (fingerprint >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+    
+    def __contains__(self, fingerprint):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fingerprint))
+    
+    def add(self, fingerprint):
+        """Insere o fingerprint; retorna True se ele (provavelmente) já existia"""
+        bits = self.bits
+        present = True
+        for pos in self._positions(fingerprint):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+    
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """Série de filtros de Bloom que cresce com o volume (Almeida et al.)
+    
+    Cada novo filtro tem growth vezes a capacidade do anterior e taxa de
+    falso positivo multiplicada por tightening, de modo que a taxa total
+    fica abaixo de error_rate sem conhecer o número de linhas de antemão.
+    """
+    
+    def __init__(self, error_rate=0.001, initial_capacity=100000, growth=2, tightening=0.5):
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate deve estar em (0, 1): {error_rate}")
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+    
+    def add(self, fingerprint):
+        """Insere o fingerprint; retorna True se ele (provavelmente) já existia"""
+        current = self.filters[-1]
+        for bloom in self.filters[:-1]:
+            if fingerprint in bloom:
+                return True
+        if current.full:
+            # O filtro cheio ainda responde por tudo o que recebeu
+            if fingerprint in current:
+                return True
+            current = BloomFilter(current.capacity * self.growth,
+                                  current.error_rate * self.tightening)
+            self.filters.append(current)
+        return current.add(fingerprint)
+    
+    def __len__(self):
+        return sum(bloom.count for bloom in self.filters)
+    
+    @property
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self.filters)
+
 
 class SEOLogAnalyzer:
     """Analisador de logs com foco em SEO"""
     
-    def __init__(self, log_file_path):
-        self.log_file_path = Path(log_file_path)
+    # URL é considerada obsoleta quando o tempo sem rastreio passa de
+    # STALE_FACTOR vezes o p90 do seu intervalo de recrawl, e só depois de
+    # STALE_MIN_INTERVALS intervalos (com menos, quase toda URL pareceria obsoleta)
+    STALE_FACTOR = 2.0
+    STALE_MIN_INTERVALS = 5
+    
+    # Tolerância de desordem local ao buscar a janela de tempo em logs ordenados
+    TIME_ORDER_SLACK = timedelta(minutes=5)
+    
+    # Estruturas que crescem com o log, medidas por memory_usage()
+    MEMORY_STRUCTURES = (
+        'bot_visits', 'bot_urls', 'bot_status_codes', 'bot_daily_visits',
+        'url_visits', 'url_last_crawl', 'url_first_crawl', 'url_crawl_by_bot',
+        'bot_url_last_crawl', 'urls_by_status', 'url_status_history', 'url_last_status',
+        'url_status_counts', 'recrawl_stats', 'error_urls', 'googlebot_crawl_depth',
+        'status_codes', 'user_agents', 'ip_hits', 'bot_ip_hits', 'sessionizer',
+        'crawl_rates', 'dedup_filter', 'canonicalizer'
+    )
+    
+    def __init__(self, log_file_path, url_mode='raw', canonicalizer=None,
+                 since=None, until=None, bot_filter=None, time_ordered=False,
+                 sample_rate=1.0, keep_timeline=False, log_format='auto',
+                 dedup=False, dedup_error_rate=0.001, reorder_window=1000,
+                 session_gap=timedelta(minutes=30)):
+        # log_file_path aceita um caminho ou uma lista (várias fontes são
+        # intercaladas por timestamp); pode ser None quando as linhas chegam
+        # por process_line()
+        if not log_file_path:
+            paths = []
+        elif isinstance(log_file_path, (str, Path)):
+            paths = [log_file_path]
+        else:
+            paths = list(log_file_path)
+        self.log_paths = [Path(path) for path in paths]
+        self.log_file_path = self.log_paths[0] if self.log_paths else None
+        
+        # Linhas de folga por fonte para corrigir desordem local na intercalação
+        self.reorder_window = reorder_window
+        
+        # Histórico completo (datetime, status) por URL só quando pedido
+        self.keep_timeline = keep_timeline
+        
+        # Amostragem determinística por hash da linha (1.0 = todas as linhas)
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate deve estar em (0, 1]: {sample_rate}")
+        self.sample_rate = sample_rate
+        self.sample_threshold = int(sample_rate * 2**32) if sample_rate < 1 else None
+        
+        # Descarta linhas idênticas (logs rotacionados ou de várias origens que se
+        # sobrepõem) com memória limitada; falsos positivos ficam abaixo de dedup_error_rate
+        self.dedup_filter = ScalableBloomFilter(dedup_error_rate) if dedup else None
+        
+        # Janela de tempo e filtro de bots aplicados já na leitura do arquivo.
+        # Com time_ordered=True o início da janela é localizado por busca binária.
+        self.since = since
+        self.until = until
+        self.bot_filter = set(bot_filter) if bot_filter else None
+        self.time_ordered = time_ordered
+        
+        # Agrupamento de URLs: 'raw' (como no log), 'canonical' ou 'template'
+        if url_mode not in URL_MODES:
+            raise ValueError(f"url_mode inválido: {url_mode!r} (use {', '.join(URL_MODES)})")
+        self.url_mode = url_mode
+        if canonicalizer is None and url_mode != 'raw':
+            canonicalizer = URLCanonicalizer()
+        self.canonicalizer = canonicalizer
+        
         self.total_lines = 0
         self.parsed_lines = 0
         self.error_lines = 0
+        self.filtered_lines = 0
+        self.unsampled_lines = 0
+        self.duplicate_lines = 0
+        self.late_lines = 0
+        self.skipped_bytes = 0
+        self.bytes_read = 0
+        self.total_bytes = 0
+        self.cancelled = False
+        self._log_handles = []  # (arquivo aberto, offset inicial)
+        self._bytes_done = 0
         
         # Dicionários para armazenar estatísticas
         self.bot_visits = defaultdict(int)
@@ -32,13 +837,27 @@ class SEOLogAnalyzer:
         self.url_crawl_by_bot = defaultdict(lambda: defaultdict(int))  # URL -> {bot: count}
         self.bot_url_last_crawl = defaultdict(dict)  # bot -> {URL: datetime}
         self.urls_by_status = defaultdict(list)  # status_code -> [URLs]
-        self.url_status_history = defaultdict(list)  # URL -> [(datetime, status)]
+        self.url_status_history = defaultdict(list)  # URL -> [(datetime, status)] (keep_timeline)
+        self.url_last_status = {}  # URL -> (datetime, status) mais recente
+        self.url_status_counts = defaultdict(Counter)  # URL -> {status: count}
+        self.recrawl_stats = defaultdict(dict)  # bot -> {URL: IntervalStats}
+        self.last_datetime = None  # timestamp mais recente visto no log
+        
+        # Sessões de rastreio por (bot, IP): nova sessão após session_gap sem requisições
+        self.sessionizer = BotSessionizer(session_gap)
+        
+        # Taxa de rastreio por bot e classe de status em minutos, horas e dias
+        self.crawl_rates = {
+            name: CrawlRateRing(step, size) for name, step, size in CRAWL_RATE_RESOLUTIONS
+        }
+        
+        # Última consulta de query_urls() (paginar não refaz filtro e ordenação)
+        self._query_cache = None
         
         # Separação de LLM bots
-        self.llm_bots = ['GPTBot', 'ChatGPT-User', 'ClaudeBot']
-        self.search_bots = ['Googlebot', 'Googlebot-Image', 'Googlebot-News', 
-                           'Googlebot-Video', 'Google-InspectionTool', 'Bingbot', 
-                           'YandexBot', 'Baiduspider', 'DuckDuckBot', 'Applebot']
+        self.llm_bots = list(LLM_BOTS)
+        self.search_bots = list(SEARCH_BOTS)
+        self.google_bots = list(GOOGLE_BOTS)
         
         # Métricas SEO avançadas
         self.googlebot_crawl_depth = defaultdict(int)  # profundidade de URL
@@ -48,44 +867,32 @@ class SEOLogAnalyzer:
         self.status_codes = Counter()
         self.user_agents = Counter()
         
+        # Requisições por IP em chaves inteiras (pack_ip); faixas /24 e /64 são
+        # agregadas sob demanda
+        self.ip_hits = Counter()  # chave do IP -> requisições
+        self.bot_ip_hits = defaultdict(Counter)  # bot -> {chave do IP: requisições}
+        
         # Padrões de bots conhecidos
-        self.bot_patterns = {
-            'Googlebot': re.compile(r'Googlebot', re.IGNORECASE),
-            'Googlebot-Image': re.compile(r'Googlebot-Image', re.IGNORECASE),
-            'Googlebot-News': re.compile(r'Googlebot-News', re.IGNORECASE),
-            'Googlebot-Video': re.compile(r'Googlebot-Video', re.IGNORECASE),
-            'Google-InspectionTool': re.compile(r'Google-InspectionTool', re.IGNORECASE),
-            'GPTBot': re.compile(r'GPTBot', re.IGNORECASE),
-            'ChatGPT-User': re.compile(r'ChatGPT-User', re.IGNORECASE),
-            'Bingbot': re.compile(r'bingbot', re.IGNORECASE),
-            'YandexBot': re.compile(r'YandexBot', re.IGNORECASE),
-            'Baiduspider': re.compile(r'Baiduspider', re.IGNORECASE),
-            'DuckDuckBot': re.compile(r'DuckDuckBot', re.IGNORECASE),
-            'Slurp': re.compile(r'Slurp', re.IGNORECASE),  # Yahoo
-            'facebookexternalhit': re.compile(r'facebookexternalhit', re.IGNORECASE),
-            'LinkedInBot': re.compile(r'LinkedInBot', re.IGNORECASE),
-            'Twitterbot': re.compile(r'Twitterbot', re.IGNORECASE),
-            'Applebot': re.compile(r'Applebot', re.IGNORECASE),
-            'AhrefsBot': re.compile(r'AhrefsBot', re.IGNORECASE),
-            'SemrushBot': re.compile(r'SemrushBot', re.IGNORECASE),
-            'MJ12bot': re.compile(r'MJ12bot', re.IGNORECASE),
-            'DotBot': re.compile(r'DotBot', re.IGNORECASE),
-            'PetalBot': re.compile(r'PetalBot', re.IGNORECASE),
-            'ClaudeBot': re.compile(r'ClaudeBot', re.IGNORECASE),
-        }
+        self.bot_patterns = dict(BOT_PATTERNS)
         
         # Padrão para parsear linha de log (Apache/Nginx Common/Combined format)
-        self.log_pattern = re.compile(
-            r'(?P<ip>[\d\.]+)\s+'
-            r'(?P<identity>-|\S+)\s+'
-            r'(?P<user>-|\S+)\s+'
-            r'\[(?P<time>[^\]]+)\]\s+'
-            r'"(?P<request>[^"]*)"\s+'
-            r'(?P<status>\d{3})\s+'
-            r'(?P<size>-|\d+)\s*'
-            r'(?:"(?P<referer>[^"]*)")?\s*'
-            r'(?:"(?P<user_agent>[^"]*)")?'
-        )
+        self.log_pattern = CombinedFormat.pattern
+        
+        # Formato do log: 'auto' detecta a partir das primeiras linhas do arquivo;
+        # aceita também um nome de LOG_FORMATS, um LogFormat ou um log_format do Nginx
+        self.detect_log_format = log_format == 'auto'
+        self.log_format = CombinedFormat() if self.detect_log_format else get_format(log_format)
+        
+        # Pré-filtro barato aplicado à linha bruta antes do parse completo
+        self.bot_prefilter = None
+        if self.bot_filter:
+            unknown = self.bot_filter - set(self.bot_patterns)
+            if unknown:
+                raise ValueError(f"Bots desconhecidos no filtro: {', '.join(sorted(unknown))}")
+            self.bot_prefilter = re.compile(
+                '|'.join(self.bot_patterns[bot].pattern for bot in self.bot_filter),
+                re.IGNORECASE
+            )
     
     def identify_bot(self, user_agent):
         """Identifica o tipo de bot baseado no User-Agent"""
@@ -97,124 +904,795 @@ class SEOLogAnalyzer:
                 return bot_name
         return None
     
-    def parse_log_line(self, line):
+    def parse_log_line(self, line, log_format=None):
         """Faz parse de uma linha do log"""
-        match = self.log_pattern.match(line)
-        if not match:
+        data = (log_format or self.log_format).parse(line)
+        if not data:
             return None
         
-        data = match.groupdict()
+        # Canonicalização / agrupamento por template
+        data['raw_url'] = data['url']
+        if self.canonicalizer and data['url']:
+            canonical, template = self.canonicalizer.resolve(data['url'])
+            data['canonical_url'] = canonical
+            data['template'] = template
+            if self.url_mode == 'canonical':
+                data['url'] = canonical
+            elif self.url_mode == 'template':
+                data['url'] = template
+        
+        # Data (o datetime já vem do formato)
+        data['date'] = data['datetime'].strftime('%Y-%m-%d') if data.get('datetime') else None
         
-        # Extrai URL da requisição
-        request_parts = data.get('request', '').split()
-        if len(request_parts) >= 2:
-            data['method'] = request_parts[0]
-            data['url'] = request_parts[1]
+        return data
+    
+    def line_timestamp(self, line, log_format=None):
+        """Extrai apenas o timestamp de uma linha (sem parse completo)"""
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='ignore')
+        return (log_format or self.log_format).timestamp(line.strip())
+    
+    def _apply_directive(self, line, log_format):
+        """Aplica a linha ao formato se for uma diretiva (#Fields:); retorna se era"""
+        prefix = log_format.directive_prefix
+        if not prefix:
+            return False
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='ignore')
+        line = line.strip()
+        if not line.startswith(prefix):
+            return False
+        log_format.directive(line)
+        return True
+    
+    def _probe_format(self, f):
+        """Cópia do formato com as diretivas do cabeçalho do arquivo aplicadas"""
+        log_format = copy.copy(self.log_format)
+        if log_format.directive_prefix:
+            f.seek(0)
+            for raw in f:
+                if raw.strip() and not self._apply_directive(raw, log_format):
+                    break
+        return log_format
+    
+    def detect_format(self, sample_size=50):
+        """Detecta o formato do log a partir das primeiras linhas do arquivo"""
+        sample = []
+        with open(self.log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                sample.append(line)
+                if len(sample) >= sample_size:
+                    break
+        self.log_format = detect_format(sample)
+        self.detect_log_format = False
+        print(f"📄 Formato detectado: {self.log_format.description}")
+        return self.log_format
+    
+    def _next_timestamp(self, f, offset, log_format=None):
+        """Posiciona no início da primeira linha em offset ou depois e retorna
+        (timestamp, fim da linha) da primeira linha com timestamp"""
+        if offset:
+            f.seek(offset - 1)
+            f.readline()
         else:
-            data['method'] = ''
-            data['url'] = ''
+            f.seek(0)
+        while True:
+            raw = f.readline()
+            if not raw:
+                return None, f.tell()
+            timestamp = self.line_timestamp(raw, log_format)
+            if timestamp is not None:
+                return timestamp, f.tell()
+    
+    def find_offset(self, f, target):
+        """Busca binária pelo offset da primeira linha com timestamp >= target.
         
-        # Parse da data
-        try:
-            # Formato: 10/Oct/2000:13:55:36 -0700
-            time_str = data['time'].split()[0]
-            data['datetime'] = datetime.strptime(time_str, '%d/%b/%Y:%H:%M:%S')
-            data['date'] = data['datetime'].strftime('%Y-%m-%d')
-        except:
-            data['datetime'] = None
-            data['date'] = None
+        Requer um arquivo binário em ordem cronológica; apenas as linhas
+        sondadas têm o timestamp interpretado, com as colunas do cabeçalho
+        (#Fields:) do arquivo.
+        """
+        log_format = self._probe_format(f)
+        lo, hi = 0, f.seek(0, 2)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            timestamp, line_end = self._next_timestamp(f, mid, log_format)
+            if timestamp is None or timestamp >= target:
+                hi = mid
+            else:
+                lo = line_end
         
-        return data
+        # Alinha no início de linha
+        if lo:
+            f.seek(lo - 1)
+            f.readline()
+            return f.tell()
+        return 0
+    
+    def log_time_range(self):
+        """Retorna (primeiro, último) timestamp das fontes lendo só o início e o fim"""
+        if self.detect_log_format:
+            self.detect_format()
+        ranges = [self._file_time_range(path) for path in self.log_paths]
+        firsts = [first for first, _ in ranges if first]
+        lasts = [last for _, last in ranges if last]
+        return (min(firsts) if firsts else None), (max(lasts) if lasts else None)
+    
+    def _file_time_range(self, path):
+        first = last = None
+        with open(path, 'rb') as f:
+            log_format = copy.copy(self.log_format)
+            for raw in f:
+                if self._apply_directive(raw, log_format):
+                    continue
+                first = self.line_timestamp(raw, log_format)
+                if first:
+                    break
+            
+            # No fim, o trecho final (cada vez maior) é lido em ordem para aplicar
+            # as diretivas que apareçam nele
+            header_format = self._probe_format(f)
+            size = f.seek(0, 2)
+            start = size
+            block = 64 * 1024
+            while start > 0 and last is None:
+                start = max(0, size - block)
+                f.seek(start)
+                lines = f.read(size - start).splitlines()
+                log_format = copy.copy(header_format)
+                for raw in lines[1:] if start else lines:
+                    if self._apply_directive(raw, log_format):
+                        continue
+                    last = self.line_timestamp(raw, log_format) or last
+                block *= 4
+        return first, last
+    
+    def _start_offset(self, path):
+        """Offset inicial de leitura (busca binária quando o log é ordenado)"""
+        if not (self.since and self.time_ordered):
+            return 0
+        with open(path, 'rb') as f:
+            return self.find_offset(f, self.since - self.TIME_ORDER_SLACK)
+    
+    def _read_lines(self, path, offset=0):
+        """Lê as linhas de um arquivo a partir do offset"""
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            if offset:
+                # O cabeçalho (#Fields:) pulado pela busca binária ainda define as colunas
+                prefix = self.log_format.directive_prefix
+                if prefix:
+                    header = []
+                    for line in f:
+                        if line.strip() and not line.startswith(prefix):
+                            break
+                        header.append(line)
+                    yield from header
+                f.seek(offset)
+            handle = (f, offset)
+            self._log_handles.append(handle)
+            try:
+                yield from f
+            finally:
+                self._log_handles.remove(handle)
+                if not f.closed:
+                    self._bytes_done += f.buffer.tell() - offset
+    
+    def _timestamped_lines(self, lines):
+        """Gera (timestamp, seq, linha, formato) de uma fonte em ordem de timestamp.
+        
+        Um heap de até reorder_window linhas corrige a desordem local. Cada fonte
+        usa a própria cópia do formato, já que as diretivas (#Fields:) são lidas
+        antes de a linha chegar a process_line(); linhas sem timestamp herdam o
+        da linha anterior para manter a posição.
+        """
+        log_format = copy.copy(self.log_format)
+        prefix = log_format.directive_prefix
+        window = []
+        last = datetime.min
+        for seq, line in enumerate(lines):
+            stripped = line.strip()
+            if prefix and stripped.startswith(prefix):
+                log_format = copy.copy(log_format)
+                log_format.directive(stripped)
+                timestamp = last
+            else:
+                timestamp = log_format.timestamp(stripped) or last
+            last = timestamp
+            heapq.heappush(window, (timestamp, seq, line, log_format))
+            if len(window) > self.reorder_window:
+                yield heapq.heappop(window)
+        while window:
+            yield heapq.heappop(window)
+    
+    def _read_sources(self):
+        """Gera (linha, formato) de todas as fontes a partir da janela de tempo.
+        
+        Várias fontes são intercaladas em ordem global de timestamp (merge
+        k-way com uma linha por fonte no heap); formato None = self.log_format.
+        """
+        offsets = [self._start_offset(path) for path in self.log_paths]
+        self.skipped_bytes = sum(offsets)
+        self.total_bytes = sum(path.stat().st_size for path in self.log_paths) - self.skipped_bytes
+        
+        if len(self.log_paths) == 1:
+            for line in self._read_lines(self.log_paths[0], offsets[0]):
+                yield line, None
+            return
+        
+        streams = [self._timestamped_lines(self._read_lines(path, offset))
+                   for path, offset in zip(self.log_paths, offsets)]
+        latest = datetime.min
+        for timestamp, _, line, log_format in heapq.merge(*streams, key=itemgetter(0)):
+            # Desordem maior que a janela: a linha sai atrasada
+            if timestamp < latest:
+                self.late_lines += 1
+            else:
+                latest = timestamp
+            yield line, log_format
+    
+    def _update_bytes_read(self):
+        """Atualiza bytes_read somando a posição do buffer de cada arquivo aberto"""
+        self.bytes_read = self._bytes_done + sum(
+            f.buffer.tell() - offset for f, offset in self._log_handles)
+    
+    def progress(self, started_at):
+        """Retorna o AnalysisProgress atual"""
+        self._update_bytes_read()
+        elapsed = max(time.monotonic() - started_at, 1e-9)
+        bytes_per_sec = self.bytes_read / elapsed
+        fraction = min(1.0, self.bytes_read / self.total_bytes) if self.total_bytes else 0.0
+        eta = None
+        if bytes_per_sec > 0 and self.total_bytes:
+            eta = max(0.0, (self.total_bytes - self.bytes_read) / bytes_per_sec)
+        return AnalysisProgress(
+            lines=self.total_lines,
+            bytes_read=self.bytes_read,
+            total_bytes=self.total_bytes,
+            elapsed=elapsed,
+            lines_per_sec=self.total_lines / elapsed,
+            bytes_per_sec=bytes_per_sec,
+            eta=eta,
+            fraction=fraction
+        )
+    
+    @staticmethod
+    def print_progress(progress):
+        """Callback padrão de progresso da CLI"""
+        eta = f"{progress.eta:,.0f}s" if progress.eta is not None else '?'
+        print(f"   Processando linha {progress.lines:,}... "
+              f"({progress.fraction:.0%}, {progress.bytes_per_sec / 1048576:.1f} MB/s, ETA {eta})")
     
-    def analyze(self):
-        """Analisa o arquivo de log"""
-        print(f"🔍 Analisando arquivo: {self.log_file_path}")
+    def analyze(self, progress_callback=None, cancel_event=None, progress_every=10000):
+        """Analisa o arquivo de log
+        
+        progress_callback recebe um AnalysisProgress a cada progress_every
+        linhas (padrão: imprime no stdout). cancel_event (ex: threading.Event)
+        interrompe a análise quando setado; nesse caso cancelled fica True.
+        """
+        for path in self.log_paths:
+            print(f"🔍 Analisando arquivo: {path}")
         print(f"{'='*80}")
         
-        if not self.log_file_path.exists():
-            print(f"❌ Erro: Arquivo não encontrado!")
+        missing = [str(path) for path in self.log_paths if not path.exists()]
+        if missing or not self.log_paths:
+            print(f"❌ Erro: Arquivo não encontrado! {', '.join(missing)}")
             return
         
-        with open(self.log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, 1):
-                self.total_lines += 1
-                
-                # Mostra progresso
-                if line_num % 10000 == 0:
-                    print(f"   Processando linha {line_num:,}...")
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Parse da linha
-                data = self.parse_log_line(line)
-                if not data:
-                    self.error_lines += 1
-                    continue
-                
-                self.parsed_lines += 1
-                
-                # Extrai informações
-                user_agent = data.get('user_agent', '')
-                url = data.get('url', '')
-                status = data.get('status', '')
-                date = data.get('date', '')
-                
-                # Identifica bot
-                bot_name = self.identify_bot(user_agent)
-                datetime_obj = data.get('datetime')
-                
-                # Estatísticas gerais
-                self.url_visits[url] += 1
-                self.status_codes[status] += 1
-                if user_agent:
-                    self.user_agents[user_agent] += 1
-                
-                # Rastreamento de último crawl por URL
-                if datetime_obj:
-                    if url not in self.url_last_crawl or datetime_obj > self.url_last_crawl[url]:
-                        self.url_last_crawl[url] = datetime_obj
-                    if url not in self.url_first_crawl:
-                        self.url_first_crawl[url] = datetime_obj
-                    
-                    # Histórico de status por URL
-                    self.url_status_history[url].append((datetime_obj, status))
-                
-                # URLs por código de status
-                if status and url:
-                    if status.startswith(('3', '4', '5')):
-                        if url not in self.urls_by_status[status]:
-                            self.urls_by_status[status].append(url)
-                        self.error_urls[status][url] += 1
-                
-                # Estatísticas de bots
-                if bot_name:
-                    self.bot_visits[bot_name] += 1
-                    self.bot_urls[bot_name].append(url)
-                    self.bot_status_codes[bot_name][status] += 1
-                    
-                    # Rastreamento por bot
-                    if url:
-                        self.url_crawl_by_bot[url][bot_name] += 1
-                        
-                        if datetime_obj:
-                            if url not in self.bot_url_last_crawl[bot_name] or \
-                               datetime_obj > self.bot_url_last_crawl[bot_name][url]:
-                                self.bot_url_last_crawl[bot_name][url] = datetime_obj
-                    
-                    if date:
-                        self.bot_daily_visits[bot_name][date] += 1
-                    
-                    # Análise específica do Googlebot
-                    if bot_name.startswith('Googlebot') and url:
-                        depth = url.count('/')
-                        self.googlebot_crawl_depth[depth] += 1
+        if self.detect_log_format:
+            self.detect_format()
+        
+        stop_after = self.until + self.TIME_ORDER_SLACK if self.until and self.time_ordered else None
+        
+        report_final_progress = progress_callback is not None
+        if progress_callback is None:
+            progress_callback = self.print_progress
+        started_at = time.monotonic()
+        
+        sources = self._read_sources()
+        for line_num, (line, log_format) in enumerate(sources, 1):
+            # Progresso e cancelamento
+            if line_num % progress_every == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.cancelled = True
+                    break
+                progress_callback(self.progress(started_at))
+            
+            if not self.process_line(line, stop_after, log_format):
+                break
+        
+        sources.close()
+        self._update_bytes_read()
+        if self.cancelled:
+            print(f"\n⛔ Análise cancelada após {self.total_lines:,} linhas")
+            return
+        if report_final_progress:
+            progress_callback(self.progress(started_at)._replace(fraction=1.0, eta=0.0))
         
         print(f"\n✅ Análise concluída!")
         print(f"   Total de linhas: {self.total_lines:,}")
         print(f"   Linhas parseadas: {self.parsed_lines:,}")
         print(f"   Linhas com erro: {self.error_lines:,}")
+        if self.since or self.until or self.bot_filter:
+            print(f"   Linhas fora do filtro: {self.filtered_lines:,}")
+        if len(self.log_paths) > 1:
+            print(f"   Fontes intercaladas por timestamp: {len(self.log_paths)} "
+                  f"({self.late_lines:,} linhas fora de ordem além da janela)")
+        if self.skipped_bytes:
+            print(f"   Bytes pulados pela busca binária: {self.skipped_bytes:,}")
+        if self.sample_threshold is not None:
+            print(f"   Amostragem: {self.sample_rate:.2%} "
+                  f"({self.unsampled_lines:,} linhas fora da amostra)")
+        if self.dedup_filter is not None:
+            print(f"   Linhas duplicadas descartadas: {self.duplicate_lines:,} "
+                  f"(filtro de Bloom: {self.dedup_filter.memory_bytes / 1048576:.1f} MB)")
+    
+    @property
+    def is_sampled(self):
+        """Indica se a análise foi feita sobre uma amostra"""
+        return self.sample_threshold is not None
+    
+    def estimate(self, count, z=1.96):
+        """Escala uma contagem amostrada para o total estimado.
+        
+        Retorna (estimativa, limite inferior, limite superior) do intervalo de
+        confiança (95% por padrão), tratando a contagem como binomial.
+        """
+        rate = self.sample_rate
+        if rate >= 1:
+            return count, count, count
+        estimate = count / rate
+        margin = z * (count * (1 - rate)) ** 0.5 / rate
+        return round(estimate), max(count, round(estimate - margin)), round(estimate + margin)
+    
+    def process_line(self, line, stop_after=None, log_format=None):
+        """Processa uma linha bruta do log (filtros, parse e agregação).
+        
+        log_format substitui self.log_format (formato próprio de cada fonte).
+        Retorna False quando a leitura pode parar (linha além de stop_after).
+        """
+        if log_format is None:
+            log_format = self.log_format
+        self.total_lines += 1
+        
+        line = line.strip()
+        if not line:
+            return True
+        
+        # Diretivas do formato (ex: #Fields: em W3C/CloudFront)
+        if log_format.directive_prefix and line.startswith(log_format.directive_prefix):
+            log_format.directive(line)
+            return True
+        
+        # Amostragem: a mesma linha sempre cai do mesmo lado do limiar
+        if self.sample_threshold is not None and \
+           zlib.crc32(line.encode('utf-8', errors='ignore')) >= self.sample_threshold:
+            self.unsampled_lines += 1
+            return True
+        
+        # Deduplicação: linhas repetidas são contadas, não agregadas
+        if self.dedup_filter is not None and self.dedup_filter.add(line_fingerprint(line)):
+            self.duplicate_lines += 1
+            return True
+        
+        # Filtro de bots antes do parse completo
+        if self.bot_prefilter and not self.bot_prefilter.search(line):
+            self.filtered_lines += 1
+            return True
+        
+        # Parse da linha
+        data = self.parse_log_line(line, log_format)
+        if not data:
+            self.error_lines += 1
+            return True
+        
+        # Janela de tempo
+        if self.since or self.until:
+            datetime_obj = data.get('datetime')
+            if datetime_obj is None:
+                self.filtered_lines += 1
+                return True
+            if stop_after and datetime_obj > stop_after:
+                return False
+            if (self.since and datetime_obj < self.since) or \
+               (self.until and datetime_obj > self.until):
+                self.filtered_lines += 1
+                return True
+        
+        if self.bot_filter:
+            data['bot'] = self.identify_bot(data.get('user_agent', ''))
+            if data['bot'] not in self.bot_filter:
+                self.filtered_lines += 1
+                return True
+        
+        self.process_record(data)
+        return True
+    
+    def process_record(self, data):
+        """Agrega um registro já parseado nas estatísticas"""
+        self.parsed_lines += 1
+        
+        # Extrai informações
+        user_agent = data.get('user_agent', '')
+        url = data.get('url', '')
+        status = data.get('status', '')
+        date = data.get('date', '')
+        
+        # Identifica bot (pode ter sido identificado pelo filtro de bots)
+        bot_name = data['bot'] if 'bot' in data else self.identify_bot(user_agent)
+        datetime_obj = data.get('datetime')
+        
+        # Estatísticas gerais
+        self.url_visits[url] += 1
+        self.status_codes[status] += 1
+        if user_agent:
+            self.user_agents[user_agent] += 1
+        ip_key = pack_ip(data.get('ip'))
+        if ip_key is not None:
+            self.ip_hits[ip_key] += 1
+        
+        # Rastreamento de último crawl por URL
+        if datetime_obj:
+            if url not in self.url_last_crawl or datetime_obj > self.url_last_crawl[url]:
+                self.url_last_crawl[url] = datetime_obj
+            if url not in self.url_first_crawl or datetime_obj < self.url_first_crawl[url]:
+                self.url_first_crawl[url] = datetime_obj
+            if self.last_datetime is None or datetime_obj > self.last_datetime:
+                self.last_datetime = datetime_obj
+            
+            # Último status por URL
+            last_status = self.url_last_status.get(url)
+            if last_status is None or datetime_obj >= last_status[0]:
+                self.url_last_status[url] = (datetime_obj, status)
+            
+            # Histórico de status por URL
+            if self.keep_timeline:
+                self.url_status_history[url].append((datetime_obj, status))
+        
+        self.url_status_counts[url][status] += 1
+        
+        # URLs por código de status
+        if status and url:
+            if status.startswith(('3', '4', '5')):
+                if url not in self.urls_by_status[status]:
+                    self.urls_by_status[status].append(url)
+                self.error_urls[status][url] += 1
+        
+        # Estatísticas de bots
+        if bot_name:
+            self.bot_visits[bot_name] += 1
+            self.bot_urls[bot_name].append(url)
+            self.bot_status_codes[bot_name][status] += 1
+            if ip_key is not None:
+                self.bot_ip_hits[bot_name][ip_key] += 1
+            
+            # Rastreamento por bot
+            if url:
+                self.url_crawl_by_bot[url][bot_name] += 1
+                
+                if datetime_obj:
+                    self.sessionizer.add(bot_name, ip_key, datetime_obj,
+                                         status.startswith(('4', '5')))
+                    
+                    previous = self.bot_url_last_crawl[bot_name].get(url)
+                    if previous is None or datetime_obj > previous:
+                        self.bot_url_last_crawl[bot_name][url] = datetime_obj
+                    
+                    # Intervalo desde o rastreio anterior deste bot nesta URL
+                    if previous is not None and datetime_obj >= previous:
+                        stats = self.recrawl_stats[bot_name].get(url)
+                        if stats is None:
+                            stats = self.recrawl_stats[bot_name][url] = IntervalStats()
+                        stats.add((datetime_obj - previous).total_seconds())
+            
+            if date:
+                self.bot_daily_visits[bot_name][date] += 1
+            
+            if datetime_obj:
+                minute = datetime_obj.toordinal() * 1440 + datetime_obj.hour * 60 + datetime_obj.minute
+                status_class = STATUS_CLASS_INDEX.get(status[:1], 4)
+                for ring in self.crawl_rates.values():
+                    ring.add(bot_name, minute, status_class)
+            
+            # Análise específica do Googlebot
+            if bot_name.startswith('Googlebot') and url:
+                depth = url.count('/')
+                self.googlebot_crawl_depth[depth] += 1
+    
+    def last_crawl_by(self, url, bots):
+        """Último rastreio da URL por qualquer um dos bots"""
+        last_crawl = None
+        for bot in bots:
+            bot_last = self.bot_url_last_crawl.get(bot, {}).get(url)
+            if bot_last and (last_crawl is None or bot_last > last_crawl):
+                last_crawl = bot_last
+        return last_crawl
+    
+    def recrawl_interval(self, url, bots):
+        """Estatísticas de intervalo de recrawl da URL combinando os bots"""
+        merged = IntervalStats()
+        for bot in bots:
+            stats = self.recrawl_stats.get(bot, {}).get(url)
+            if stats:
+                merged.merge(stats)
+        return merged
+    
+    @staticmethod
+    def stale_reference(interval):
+        """Intervalo de referência da obsolescência (segundos).
+        
+        O p90 de poucos valores subestima o real; enquanto a amostra é exata
+        (sem sketch) usa o maior intervalo já visto.
+        """
+        reference = interval.quantile(0.9) if interval.sketch is not None else interval.max
+        return max(reference, 1.0)
+    
+    def is_stale(self, interval, last_crawl):
+        """URL está há mais de STALE_FACTOR x p90 do seu intervalo sem rastreio?
+        
+        O tempo é medido até o timestamp mais recente do log, não até agora.
+        """
+        if interval.count < self.STALE_MIN_INTERVALS or not last_crawl or not self.last_datetime:
+            return False
+        elapsed = (self.last_datetime - last_crawl).total_seconds()
+        return elapsed > self.STALE_FACTOR * self.stale_reference(interval)
+    
+    def stale_urls(self, bots):
+        """Lista URLs obsoletas para os bots, das mais atrasadas para as menos"""
+        urls = set()
+        for bot in bots:
+            urls.update(self.recrawl_stats.get(bot, {}))
+        
+        stale = []
+        for url in urls:
+            interval = self.recrawl_interval(url, bots)
+            last_crawl = self.last_crawl_by(url, bots)
+            if self.is_stale(interval, last_crawl):
+                elapsed = (self.last_datetime - last_crawl).total_seconds()
+                stale.append({
+                    'url': url,
+                    'last_crawl': last_crawl,
+                    'hours_since': round(elapsed / 3600, 2),
+                    'p90_hours': round(interval.quantile(0.9) / 3600, 2),
+                    'overdue_ratio': round(elapsed / self.stale_reference(interval), 2)
+                })
+        stale.sort(key=lambda x: x['overdue_ratio'], reverse=True)
+        return stale
+    
+    def query_urls(self, bot=None, status_class=None, prefix=None, stale=False,
+                   sort='crawls', descending=True):
+        """Filtra e ordena as URLs a partir dos agregados em memória.
+        
+        bot: rastreadas por este bot; status_class: '2'..'5' (alguma resposta
+        desta classe); prefix: caminho começa com; stale: só URLs obsoletas
+        (para o bot ou para todos os bots juntos). Retorna a lista de URLs, guardada
+        em cache para que a paginação da mesma consulta seja só um slice.
+        """
+        if sort not in URL_SORT_KEYS:
+            raise ValueError(f"sort inválido: {sort!r} (use {', '.join(URL_SORT_KEYS)})")
+        key = (bot, status_class, prefix, stale, sort, descending, self.parsed_lines)
+        if self._query_cache and self._query_cache[0] == key:
+            return self._query_cache[1]
+        
+        crawl_by_bot = self.url_crawl_by_bot
+        status_counts = self.url_status_counts
+        stale_bots = [bot] if bot else list(self.recrawl_stats)
+        stale_candidates = set()
+        if stale:
+            for stale_bot in stale_bots:
+                stale_candidates.update(self.recrawl_stats.get(stale_bot, {}))
+        
+        urls = []
+        for url in self.url_visits:
+            if bot and bot not in crawl_by_bot.get(url, ()):
+                continue
+            if prefix and not url.startswith(prefix):
+                continue
+            if status_class and not any(status.startswith(status_class)
+                                        for status in status_counts.get(url, ())):
+                continue
+            if stale and not (url in stale_candidates and self.is_stale(
+                    self.recrawl_interval(url, stale_bots), self.last_crawl_by(url, stale_bots))):
+                continue
+            urls.append(url)
+        
+        sort_keys = {
+            'crawls': (lambda url: crawl_by_bot[url][bot]) if bot else self.url_visits.__getitem__,
+            'last_crawl': lambda url: self.url_last_crawl.get(url, datetime.min),
+            'first_crawl': lambda url: self.url_first_crawl.get(url, datetime.min),
+            'bots': lambda url: len(crawl_by_bot.get(url, ())),
+            'url': None
+        }
+        urls.sort(key=sort_keys[sort], reverse=descending)
+        
+        self._query_cache = (key, urls)
+        return urls
+    
+    def url_rows(self, urls, bot=None):
+        """Linhas de tabela (uma por URL) para uma página de query_urls()"""
+        for url in urls:
+            last_crawl = self.url_last_crawl.get(url)
+            first_crawl = self.url_first_crawl.get(url)
+            by_bot = self.url_crawl_by_bot.get(url, {})
+            statuses = self.url_status_counts.get(url)
+            bots = [bot] if bot else list(by_bot)
+            row = {
+                'URL': url,
+                'Rastreios': self.url_visits[url],
+                'Último rastreio': last_crawl.strftime('%Y-%m-%d %H:%M:%S') if last_crawl else 'N/A',
+                'Primeiro rastreio': first_crawl.strftime('%Y-%m-%d %H:%M:%S') if first_crawl else 'N/A',
+                'Bots diferentes': len(by_bot),
+                'Status predominante': statuses.most_common(1)[0][0] if statuses else 'N/A',
+                'Obsoleta': 'Sim' if self.is_stale(self.recrawl_interval(url, bots),
+                                                   self.last_crawl_by(url, bots)) else 'Não'
+            }
+            if bot:
+                row[f'Rastreios {bot}'] = by_bot.get(bot, 0)
+            yield row
+    
+    def recrawl_summary(self):
+        """Percentis de intervalo de recrawl por bot (todas as URLs)"""
+        summary = {}
+        for bot, url_stats in self.recrawl_stats.items():
+            merged = IntervalStats()
+            for stats in url_stats.values():
+                merged.merge(stats)
+            if not merged.count:
+                continue
+            summary[bot] = {
+                'urls_recrawled': len(url_stats),
+                'intervals': merged.count,
+                'mean_hours': round(merged.mean / 3600, 2),
+                'p50_hours': round(merged.quantile(0.5) / 3600, 2),
+                'p90_hours': round(merged.quantile(0.9) / 3600, 2),
+                'p99_hours': round(merged.quantile(0.99) / 3600, 2),
+                'stale_urls': len(self.stale_urls([bot]))
+            }
+        return summary
+    
+    def session_summary(self):
+        """Estatísticas das sessões de rastreio por bot (requisições e duração)"""
+        summary = {}
+        for bot, stats in self.sessionizer.stats().items():
+            requests, durations = stats.requests, stats.durations
+            total_requests = round(requests.mean * requests.count)
+            summary[bot] = {
+                'sessions': requests.count,
+                'requests': total_requests,
+                'requests_per_session': {
+                    'mean': round(requests.mean, 2),
+                    'p50': round(requests.quantile(0.5)),
+                    'p90': round(requests.quantile(0.9)),
+                    'max': requests.max
+                },
+                'duration_minutes': {
+                    'mean': round(durations.mean / 60, 2),
+                    'p50': round(durations.quantile(0.5) / 60, 2),
+                    'p90': round(durations.quantile(0.9) / 60, 2),
+                    'max': round(durations.max / 60, 2)
+                },
+                'error_rate': round(stats.error_requests / total_requests, 4) if total_requests else 0.0
+            }
+        return summary
+    
+    def ip_rollup(self, hits=None):
+        """Agrega contagens por IP em faixas /24 (IPv4) e /64 (IPv6)"""
+        rollup = Counter()
+        for key, count in (self.ip_hits if hits is None else hits).items():
+            rollup[ip_prefix(key)] += count
+        return rollup
+    
+    def ip_bots(self, key):
+        """Bots (pelo user agent declarado) que usaram o IP, com contagens"""
+        return {bot: hits[key] for bot, hits in self.bot_ip_hits.items() if key in hits}
+    
+    def ip_summary(self, top=20):
+        """Top IPs, top faixas de rede e cardinalidade de IPs por bot"""
+        ipv6 = sum(1 for key in self.ip_hits if key & IPV6_FLAG)
+        prefixes = self.ip_rollup()
+        prefix_ips = Counter(ip_prefix(key) for key in self.ip_hits)
+        return {
+            'unique_ipv4': len(self.ip_hits) - ipv6,
+            'unique_ipv6': ipv6,
+            'unique_prefixes': len(prefixes),
+            'top_ips': [
+                {'ip': str(unpack_ip(key)), 'requests': count, 'bots': self.ip_bots(key)}
+                for key, count in self.ip_hits.most_common(top)
+            ],
+            'top_prefixes': [
+                {'prefix': format_prefix(key), 'requests': count, 'ips': prefix_ips[key]}
+                for key, count in prefixes.most_common(top)
+            ],
+            'bots': {
+                bot: {
+                    'unique_ips': len(hits),
+                    'unique_prefixes': len({ip_prefix(key) for key in hits}),
+                    'top_prefixes': {
+                        format_prefix(key): count
+                        for key, count in self.ip_rollup(hits).most_common(5)
+                    }
+                }
+                for bot, hits in sorted(self.bot_ip_hits.items(), key=lambda x: len(x[1]), reverse=True)
+            }
+        }
+    
+    def crawl_rate_summary(self, max_points=500):
+        """Séries de requisições por bot e classe de status em cada resolução"""
+        return {name: ring.export(max_points) for name, ring in self.crawl_rates.items()}
+    
+    def memory_usage(self, sample=100, top_allocations=10):
+        """Entradas e tamanho aproximado de cada estrutura de MEMORY_STRUCTURES.
+        
+        Cada estrutura é medida isoladamente com deep_sizeof (strings compartilhadas
+        entre estruturas contam em todas), então a soma superestima o total; com
+        tracemalloc ativo o resultado inclui a memória rastreada e as linhas que
+        mais alocaram. Durante a análise, chame a partir do progress_callback.
+        """
+        structures = []
+        for name in self.MEMORY_STRUCTURES:
+            obj = getattr(self, name)
+            if obj is None:
+                continue
+            entries = len(obj) if hasattr(obj, '__len__') else None
+            nested = None
+            if isinstance(obj, dict) and obj and all(hasattr(v, '__len__') for v in islice(obj.values(), 10)):
+                nested = sum(len(value) for value in obj.values())
+            structures.append({
+                'name': name,
+                'entries': entries,
+                'nested_entries': nested,
+                'bytes': deep_sizeof(obj, sample)
+            })
+        structures.sort(key=lambda x: x['bytes'], reverse=True)
+        
+        usage = {
+            'lines': self.total_lines,
+            'structures': structures,
+            'traced_current': None,
+            'traced_peak': None,
+            'top_allocations': []
+        }
+        if tracemalloc.is_tracing():
+            usage['traced_current'], usage['traced_peak'] = tracemalloc.get_traced_memory()
+        if tracemalloc.is_tracing() and top_allocations:
+            statistics = (
+                stat for stat in tracemalloc.take_snapshot().statistics('lineno')
+                if stat.traceback[0].filename != tracemalloc.__file__
+            )
+            usage['top_allocations'] = [
+                {
+                    'location': f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+                    'bytes': stat.size,
+                    'blocks': stat.count
+                }
+                for stat in islice(statistics, top_allocations)
+            ]
+        return usage
+    
+    @staticmethod
+    def format_memory_usage(usage):
+        """Tabela em texto de memory_usage()"""
+        lines = [f"🧠 MEMÓRIA POR ESTRUTURA ({usage['lines']:,} linhas)", "-" * 80]
+        for item in usage['structures']:
+            entries = f"{item['entries']:,}" if item['entries'] is not None else '-'
+            nested = f" ({item['nested_entries']:,} internas)" if item['nested_entries'] is not None else ''
+            lines.append(f"  {item['name']:22s} {item['bytes'] / 1048576:9.2f} MB  {entries:>10s} entradas{nested}")
+        if usage['traced_current'] is not None:
+            lines.append(f"  tracemalloc: {usage['traced_current'] / 1048576:.1f} MB em uso, "
+                         f"pico de {usage['traced_peak'] / 1048576:.1f} MB")
+            for item in usage['top_allocations']:
+                lines.append(f"    {item['location']:40s} {item['bytes'] / 1048576:9.2f} MB "
+                             f"({item['blocks']:,} blocos)")
+        return "\n".join(lines)
+    
+    def _recrawl_columns(self, interval, last_crawl):
+        """Colunas de recrawl (médio, p50, p90 em horas e obsolescência) para os CSVs"""
+        if not interval.count:
+            return ['N/A', 'N/A', 'N/A', 'N/A']
+        return [
+            round(interval.mean / 3600, 2),
+            round(interval.quantile(0.5) / 3600, 2),
+            round(interval.quantile(0.9) / 3600, 2),
+            'Sim' if self.is_stale(interval, last_crawl) else 'Não'
+        ]
     
     def generate_report(self):
         """Gera relatório completo"""
@@ -230,6 +1708,23 @@ class SEOLogAnalyzer:
         report.append(f"Total de requisições analisadas: {self.parsed_lines:,}")
         report.append(f"Total de URLs únicas: {len(self.url_visits):,}")
         report.append(f"Total de User-Agents únicos: {len(self.user_agents):,}")
+        if self.url_mode != 'raw':
+            report.append(f"Agrupamento de URLs: {self.url_mode}")
+        if len(self.log_paths) > 1:
+            report.append(f"Fontes de log intercaladas por timestamp: {len(self.log_paths)}")
+        if self.since or self.until:
+            since_str = self.since.strftime('%Y-%m-%d %H:%M:%S') if self.since else 'início'
+            until_str = self.until.strftime('%Y-%m-%d %H:%M:%S') if self.until else 'fim'
+            report.append(f"Janela de tempo: {since_str} até {until_str}")
+        if self.bot_filter:
+            report.append(f"Filtro de bots: {', '.join(sorted(self.bot_filter))}")
+        if self.is_sampled:
+            estimate, low, high = self.estimate(self.parsed_lines)
+            report.append(f"⚠️ Amostragem de {self.sample_rate:.2%}: contagens abaixo são da amostra")
+            report.append(f"Requisições estimadas: {estimate:,} (IC 95%: {low:,} - {high:,})")
+        if self.dedup_filter is not None:
+            report.append(f"Linhas duplicadas descartadas: {self.duplicate_lines:,} "
+                          f"(falso positivo ≤ {self.dedup_filter.error_rate:.2%})")
         report.append("")
         
         # Análise de Bots
@@ -305,19 +1800,68 @@ class SEOLogAnalyzer:
             report.append(f"{status}: {count:8,} ({percentage:6.2f}%)")
         report.append("")
         
+        # IPs e faixas de rede
+        if self.ip_hits:
+            ips = self.ip_summary()
+            report.append("🌐 IPs E FAIXAS DE REDE")
+            report.append("-" * 80)
+            report.append(f"IPs únicos: {ips['unique_ipv4']:,} IPv4, {ips['unique_ipv6']:,} IPv6 "
+                          f"em {ips['unique_prefixes']:,} faixas (/24 e /64)")
+            report.append("")
+            report.append("Top 20 IPs:")
+            for item in ips['top_ips']:
+                bots = ', '.join(sorted(item['bots'], key=item['bots'].get, reverse=True)) or '-'
+                report.append(f"  {item['ip']:39s} {item['requests']:8,}  {bots}")
+            report.append("")
+            report.append("Top 20 faixas de rede:")
+            for item in ips['top_prefixes']:
+                report.append(f"  {item['prefix']:43s} {item['requests']:8,} ({item['ips']:,} IPs)")
+            if ips['bots']:
+                report.append("")
+                report.append("IPs distintos por bot:")
+                for bot, item in ips['bots'].items():
+                    report.append(f"  {bot:30s}: {item['unique_ips']:6,} IPs em {item['unique_prefixes']:,} faixas")
+            report.append("")
+        
         report.append("=" * 80)
         
         return "\n".join(report)
     
-    def save_json_report(self, output_file):
-        """Salva relatório em formato JSON para análise adicional"""
-        data = {
+    def build_json_report(self):
+        """Monta o relatório estruturado (base do JSON)"""
+        return {
             'summary': {
                 'total_lines': self.total_lines,
                 'parsed_lines': self.parsed_lines,
                 'error_lines': self.error_lines,
                 'unique_urls': len(self.url_visits),
-                'unique_user_agents': len(self.user_agents)
+                'unique_user_agents': len(self.user_agents),
+                'url_mode': self.url_mode,
+                'log_format': self.log_format.name,
+                'filtered_lines': self.filtered_lines,
+                'duplicate_lines': self.duplicate_lines,
+                'sources': [str(path) for path in self.log_paths],
+                'late_lines': self.late_lines
+            },
+            'sampling': {
+                'rate': self.sample_rate,
+                'estimated_requests': list(self.estimate(self.parsed_lines)),
+                'estimated_bot_visits': {
+                    bot_name: list(self.estimate(count))
+                    for bot_name, count in self.bot_visits.items()
+                }
+            } if self.is_sampled else None,
+            'dedup': {
+                'duplicate_lines': self.duplicate_lines,
+                'unique_lines': len(self.dedup_filter),
+                'error_rate': self.dedup_filter.error_rate,
+                'filters': len(self.dedup_filter.filters),
+                'memory_bytes': self.dedup_filter.memory_bytes
+            } if self.dedup_filter is not None else None,
+            'filters': {
+                'since': self.since.isoformat() if self.since else None,
+                'until': self.until.isoformat() if self.until else None,
+                'bots': sorted(self.bot_filter) if self.bot_filter else None
             },
             'bots': {
                 bot_name: {
@@ -329,14 +1873,77 @@ class SEOLogAnalyzer:
                 for bot_name, count in self.bot_visits.items()
             },
             'top_urls': dict(self.url_visits.most_common(100)),
-            'status_codes': dict(self.status_codes)
+            'recrawl': self.recrawl_summary(),
+            'sessions': {
+                'gap_minutes': self.sessionizer.gap.total_seconds() / 60,
+                'open_sessions': len(self.sessionizer.active),
+                'peak_open_sessions': self.sessionizer.peak_active,
+                'bots': self.session_summary()
+            },
+            'stale_urls': {
+                'googlebot': [
+                    {**item, 'last_crawl': item['last_crawl'].isoformat()}
+                    for item in self.stale_urls(self.google_bots)[:100]
+                ],
+                'llm_bots': [
+                    {**item, 'last_crawl': item['last_crawl'].isoformat()}
+                    for item in self.stale_urls(self.llm_bots)[:100]
+                ]
+            },
+            'status_codes': dict(self.status_codes),
+            'ips': self.ip_summary(),
+            'crawl_rate': self.crawl_rate_summary()
         }
+    
+    def save_json_report(self, output_file):
+        """Salva relatório em formato JSON para análise adicional"""
+        data = self.build_json_report()
         
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         print(f"💾 Relatório JSON salvo em: {output_file}")
     
+    def snapshot(self):
+        """Agregados por URL e por bot usados na comparação entre períodos"""
+        first = min(self.url_first_crawl.values(), default=None)
+        urls = {}
+        for url, visits in self.url_visits.items():
+            last_crawl = self.url_last_crawl.get(url)
+            urls[url] = [
+                visits,
+                last_crawl.isoformat() if last_crawl else None,
+                dict(self.url_status_counts.get(url, {})),
+                dict(self.url_crawl_by_bot.get(url, {}))
+            ]
+        return {
+            'version': SNAPSHOT_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'sources': [str(path) for path in self.log_paths],
+            'period': {
+                'first': first.isoformat() if first else None,
+                'last': self.last_datetime.isoformat() if self.last_datetime else None
+            },
+            'summary': {
+                'total_lines': self.total_lines,
+                'parsed_lines': self.parsed_lines,
+                'url_mode': self.url_mode,
+                'sample_rate': self.sample_rate
+            },
+            'bot_visits': dict(self.bot_visits),
+            'status_codes': dict(self.status_codes),
+            'urls': urls  # URL -> [visitas, último rastreio, {status: n}, {bot: n}]
+        }
+    
+    def save_snapshot(self, output_file):
+        """Salva os agregados (JSON, comprimido com gzip se terminar em .gz)"""
+        output_file = Path(output_file)
+        opener = gzip.open if output_file.suffix == '.gz' else open
+        with opener(output_file, 'wt', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, separators=(',', ':'))
+        
+        print(f"💾 Snapshot para comparação salvo em: {output_file}")
+    
     def generate_csv_url_ranking(self, output_file):
         """Gera CSV com ranking de URLs por frequência de rastreio"""
         import csv
@@ -425,8 +2032,7 @@ class SEOLogAnalyzer:
                 for url, count in sorted(self.error_urls[status_code].items(), 
                                         key=lambda x: x[1], reverse=True):
                     # Pega o último status conhecido dessa URL
-                    history = self.url_status_history.get(url, [])
-                    last_status = history[-1][1] if history else status_code
+                    last_status = self.url_last_status.get(url, (None, status_code))[1]
                     
                     writer.writerow([
                         url,
@@ -444,8 +2050,7 @@ class SEOLogAnalyzer:
         import csv
         
         googlebot_urls = defaultdict(int)
-        for bot_name in ['Googlebot', 'Googlebot-Image', 'Googlebot-News', 
-                        'Googlebot-Video', 'Google-InspectionTool']:
+        for bot_name in self.google_bots:
             if bot_name in self.bot_urls:
                 for url in self.bot_urls[bot_name]:
                     googlebot_urls[url] += 1
@@ -459,20 +2064,18 @@ class SEOLogAnalyzer:
                 'Dias_Desde_Ultimo',
                 'Profundidade_URL',
                 'Status_Predominante',
-                'Crawl_Priority'
+                'Crawl_Priority',
+                'Recrawl_Medio_Horas',
+                'Recrawl_P50_Horas',
+                'Recrawl_P90_Horas',
+                'URL_Obsoleta'
             ])
             
             from datetime import datetime as dt
             now = dt.now()
             
             for url, count in sorted(googlebot_urls.items(), key=lambda x: x[1], reverse=True):
-                last_crawl = None
-                for bot in ['Googlebot', 'Googlebot-Image', 'Googlebot-News', 
-                           'Googlebot-Video', 'Google-InspectionTool']:
-                    if bot in self.bot_url_last_crawl and url in self.bot_url_last_crawl[bot]:
-                        bot_last = self.bot_url_last_crawl[bot][url]
-                        if last_crawl is None or bot_last > last_crawl:
-                            last_crawl = bot_last
+                last_crawl = self.last_crawl_by(url, self.google_bots)
                 
                 if last_crawl:
                     days_since = (now - last_crawl).days
@@ -484,9 +2087,8 @@ class SEOLogAnalyzer:
                 depth = url.count('/')
                 
                 # Status predominante
-                history = self.url_status_history.get(url, [])
-                if history:
-                    status_counts = Counter([s[1] for s in history])
+                status_counts = self.url_status_counts.get(url)
+                if status_counts:
                     predominant_status = status_counts.most_common(1)[0][0]
                 else:
                     predominant_status = 'N/A'
@@ -501,6 +2103,8 @@ class SEOLogAnalyzer:
                 else:
                     priority = 'Baixa'
                 
+                interval = self.recrawl_interval(url, self.google_bots)
+                
                 writer.writerow([
                     url,
                     count,
@@ -508,7 +2112,8 @@ class SEOLogAnalyzer:
                     days_since,
                     depth,
                     predominant_status,
-                    priority
+                    priority,
+                    *self._recrawl_columns(interval, last_crawl)
                 ])
         
         print(f"💾 CSV de análise do Googlebot salvo em: {output_file}")
@@ -532,7 +2137,11 @@ class SEOLogAnalyzer:
                 'ChatGPT-User',
                 'Total_LLM_Bots',
                 'Googlebot_Comparativo',
-                'Indexado_Por'
+                'Indexado_Por',
+                'Recrawl_Medio_Horas',
+                'Recrawl_P50_Horas',
+                'Recrawl_P90_Horas',
+                'URL_Obsoleta'
             ])
             
             for url in sorted(all_llm_urls):
@@ -551,6 +2160,9 @@ class SEOLogAnalyzer:
                 if chatgpt > 0:
                     indexed_by.append('ChatGPT')
                 
+                interval = self.recrawl_interval(url, self.llm_bots)
+                last_crawl = self.last_crawl_by(url, self.llm_bots)
+                
                 writer.writerow([
                     url,
                     gptbot,
@@ -558,28 +2170,149 @@ class SEOLogAnalyzer:
                     chatgpt,
                     total_llm,
                     googlebot,
-                    ', '.join(indexed_by)
+                    ', '.join(indexed_by),
+                    *self._recrawl_columns(interval, last_crawl)
                 ])
         
         print(f"💾 CSV de comparação de LLM bots salvo em: {output_file}")
+    
+    def generate_csv_bot_sessions(self, output_file):
+        """Gera CSV com as sessões de rastreio por bot"""
+        import csv
+        
+        summary = self.session_summary()
+        
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                'Bot',
+                'Sessoes',
+                'Requisicoes',
+                'Req_Por_Sessao_Media',
+                'Req_Por_Sessao_P50',
+                'Req_Por_Sessao_P90',
+                'Req_Por_Sessao_Max',
+                'Duracao_Media_Min',
+                'Duracao_P50_Min',
+                'Duracao_P90_Min',
+                'Duracao_Max_Min',
+                'Taxa_Erro'
+            ])
+            
+            for bot, stats in sorted(summary.items(), key=lambda x: x[1]['requests'], reverse=True):
+                per_session = stats['requests_per_session']
+                duration = stats['duration_minutes']
+                writer.writerow([
+                    bot,
+                    stats['sessions'],
+                    stats['requests'],
+                    per_session['mean'],
+                    per_session['p50'],
+                    per_session['p90'],
+                    per_session['max'],
+                    duration['mean'],
+                    duration['p50'],
+                    duration['p90'],
+                    duration['max'],
+                    f"{stats['error_rate']:.2%}"
+                ])
+        
+        print(f"💾 CSV de sessões de bots salvo em: {output_file}")
+
+
+def parse_cli_datetime(value):
+    """Converte datas da linha de comando"""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value}")
 
 
 def main():
     """Função principal"""
-    import sys
+    import argparse
     
-    # Define caminho do arquivo de log
-    log_file = Path(__file__).parent / 'acess.log'
+    parser = argparse.ArgumentParser(description='Analisa logs de acesso com foco em SEO')
+    parser.add_argument('log_files', nargs='*', metavar='log_file',
+                        default=[str(Path(__file__).parent / 'acess.log')],
+                        help='Arquivo(s) de log (padrão: acess.log ao lado do script); '
+                             'vários arquivos são intercalados por timestamp')
+    parser.add_argument('--format', default='auto', dest='log_format',
+                        help=f"Formato do log: auto, {', '.join(LOG_FORMATS)} "
+                             f"ou uma string log_format do Nginx")
+    parser.add_argument('--url-mode', choices=URL_MODES, default='raw',
+                        help='Agrupa URLs como no log (raw), canônicas ou por template')
+    parser.add_argument('--strip-param', action='append', default=None, metavar='PARAM',
+                        help='Parâmetro de query a remover (aceita prefixo com *, ex: utm_*)')
+    parser.add_argument('--template', action='append', default=[], metavar='TEMPLATE',
+                        help='Template explícito de URL, ex: /produto/{id}')
+    parser.add_argument('--lowercase-paths', action='store_true',
+                        help='Ignora maiúsculas/minúsculas no caminho ao agrupar URLs '
+                             '(só para servidores que não diferenciam, como o IIS)')
+    parser.add_argument('--since', type=parse_cli_datetime,
+                        help='Início da janela (YYYY-MM-DD ou "YYYY-MM-DD HH:MM:SS")')
+    parser.add_argument('--until', type=parse_cli_datetime,
+                        help='Fim da janela (YYYY-MM-DD ou "YYYY-MM-DD HH:MM:SS")')
+    parser.add_argument('--last-days', type=int, metavar='N',
+                        help='Analisa só os últimos N dias do log')
+    parser.add_argument('--bot', action='append', dest='bots', metavar='BOT',
+                        help='Analisa só requisições deste bot (pode repetir)')
+    parser.add_argument('--time-ordered', action='store_true',
+                        help='Log em ordem cronológica: localiza a janela por busca binária')
+    parser.add_argument('--timeline', action='store_true',
+                        help='Guarda o histórico completo (data, status) de cada URL')
+    parser.add_argument('--sample-rate', type=float, default=1.0, metavar='TAXA',
+                        help='Analisa só uma amostra determinística das linhas (ex: 0.01)')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Descarta linhas repetidas (logs rotacionados ou de várias origens)')
+    parser.add_argument('--dedup-error-rate', type=float, default=0.001, metavar='TAXA',
+                        help='Taxa máxima de falso positivo da deduplicação (padrão: 0.001)')
+    parser.add_argument('--snapshot', metavar='ARQUIVO',
+                        help='Salva os agregados para comparar períodos depois com '
+                             'seo_log_compare.py (ex: semana_01.json.gz)')
+    parser.add_argument('--session-gap', type=float, default=30, metavar='MINUTOS',
+                        help='Inatividade que encerra uma sessão de rastreio (padrão: 30)')
+    parser.add_argument('--reorder-window', type=int, default=1000, metavar='N',
+                        help='Linhas de folga por arquivo para corrigir desordem local ao '
+                             'intercalar vários arquivos (padrão: 1000)')
+    parser.add_argument('--memory', action='store_true',
+                        help='Mede a memória de cada estrutura ao fim da análise '
+                             '(usa tracemalloc, o que deixa a análise mais lenta)')
+    args = parser.parse_args()
     
-    # Permite passar arquivo como argumento
-    if len(sys.argv) > 1:
-        log_file = Path(sys.argv[1])
+    # Define caminho dos arquivos de log
+    log_files = [Path(path) for path in args.log_files]
+    log_file = log_files[0]
+    
+    canonicalizer = None
+    if args.url_mode != 'raw':
+        canonicalizer = URLCanonicalizer(strip_params=args.strip_param,
+                                         lowercase_path=args.lowercase_paths,
+                                         templates=args.template)
     
     # Cria analisador
-    analyzer = SEOLogAnalyzer(log_file)
+    analyzer = SEOLogAnalyzer(log_files, url_mode=args.url_mode, canonicalizer=canonicalizer,
+                              since=args.since, until=args.until, bot_filter=args.bots,
+                              time_ordered=args.time_ordered, sample_rate=args.sample_rate,
+                              keep_timeline=args.timeline, log_format=args.log_format,
+                              dedup=args.dedup, dedup_error_rate=args.dedup_error_rate,
+                              reorder_window=args.reorder_window,
+                              session_gap=timedelta(minutes=args.session_gap))
+    
+    if args.last_days and all(path.exists() for path in log_files):
+        _, last = analyzer.log_time_range()
+        if last:
+            analyzer.since = last - timedelta(days=args.last_days)
     
     # Analisa o log
+    if args.memory:
+        tracemalloc.start()
     analyzer.analyze()
+    if args.memory:
+        print("\n" + analyzer.format_memory_usage(analyzer.memory_usage()))
+        tracemalloc.stop()
     
     # Gera e exibe relatório
     print("\n")
@@ -614,6 +2347,12 @@ def main():
     csv_llm = output_dir / 'comparacao_llm_bots.csv'
     analyzer.generate_csv_llm_bots_comparison(csv_llm)
     
+    csv_sessions = output_dir / 'sessoes_bots.csv'
+    analyzer.generate_csv_bot_sessions(csv_sessions)
+    
+    if args.snapshot:
+        analyzer.save_snapshot(args.snapshot)
+    
     print("\n✅ Análise completa!")
     print(f"\n📁 Arquivos gerados:")
     print(f"   📄 {txt_report_file}")
@@ -622,6 +2361,7 @@ def main():
     print(f"   📊 {csv_error_urls}")
     print(f"   📊 {csv_googlebot}")
     print(f"   📊 {csv_llm}")
+    print(f"   📊 {csv_sessions}")
 
 
 if __name__ == '__main__':
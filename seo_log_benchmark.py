@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SEO Log Benchmark
+Mede o crescimento da memória do SEOLogAnalyzer por estrutura em logs
+sintéticos de cardinalidade crescente (URLs e IPs únicos)
+"""
+
+import contextlib
+import csv
+import io
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from seo_log_analyzer import SEOLogAnalyzer
+
+
+# User agents dos logs sintéticos: (peso, user agent)
+SYNTHETIC_AGENTS = [
+    (30, 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'),
+    (10, 'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)'),
+    (10, 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.2; +https://openai.com/gptbot)'),
+    (5, 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; ClaudeBot/1.0; +claudebot@anthropic.com)'),
+    (5, 'Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)'),
+    (40, 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+         'Chrome/120.0 Safari/537.36'),
+]
+
+# Status dos logs sintéticos: (peso, status)
+SYNTHETIC_STATUSES = [(85, '200'), (6, '301'), (2, '304'), (5, '404'), (2, '500')]
+
+# Linha no formato combined
+SYNTHETIC_LINE = '{ip} - - [{time} +0000] "GET {url} HTTP/1.1" {status} {size} "-" "{agent}"\n'
+
+# Cardinalidades (URLs únicas) medidas por padrão
+DEFAULT_CARDINALITIES = (1000, 10000, 100000)
+
+# Crescimento (fim / meio da análise) a partir do qual uma estrutura é
+# considerada proporcional às linhas lidas: o dobro de linhas com cardinalidade
+# já saturada deveria manter as estruturas por URL estáveis
+LINE_GROWTH_THRESHOLD = 1.5
+
+
+def generate_log(path, lines, urls, ips=None, seed=0):
+    """Gera um log combined sintético com urls URLs e ips IPs únicos"""
+    rng = random.Random(seed)
+    ips = ips or max(50, urls // 10)
+    agent_weights, agents = zip(*SYNTHETIC_AGENTS)
+    status_weights, statuses = zip(*SYNTHETIC_STATUSES)
+    timestamp = datetime(2026, 1, 1)
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(lines):
+            timestamp += timedelta(seconds=rng.randint(0, 3))
+            ip = rng.randrange(ips)
+            f.write(SYNTHETIC_LINE.format(
+                ip=f"10.{ip >> 16 & 255}.{ip >> 8 & 255}.{ip & 255}",
+                time=timestamp.strftime('%d/%b/%Y:%H:%M:%S'),
+                url=f"/pagina/{rng.randrange(urls)}",
+                status=rng.choices(statuses, status_weights)[0],
+                size=rng.randint(200, 50000),
+                agent=rng.choices(agents, agent_weights)[0]
+            ))
+
+
+def profile_analysis(log_path, samples=10, sample=100, **analyzer_options):
+    """Analisa log_path com tracemalloc e mede as estruturas a cada 1/samples do arquivo.
+    
+    Retorna (analisador, lista de memory_usage()); só a última medição inclui
+    as linhas que mais alocaram, que exigem um snapshot completo do tracemalloc.
+    """
+    with open(log_path, 'rb') as f:
+        total_lines = sum(1 for _ in f)
+    
+    analyzer = SEOLogAnalyzer(log_path, **analyzer_options)
+    measurements = []
+    
+    def on_progress(progress):
+        measurements.append(analyzer.memory_usage(sample, top_allocations=0))
+    
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze(progress_callback=on_progress,
+                             progress_every=total_lines // samples + 1)
+        # O progresso final do analyze() é substituído pela medição completa
+        measurements[-1] = analyzer.memory_usage(sample)
+    finally:
+        tracemalloc.stop()
+    return analyzer, measurements
+
+
+def line_growth(measurements):
+    """Crescimento de cada estrutura entre a metade e o fim da análise"""
+    final = measurements[-1]
+    middle = min(measurements, key=lambda usage: abs(usage['lines'] - final['lines'] / 2))
+    before = {item['name']: item['bytes'] for item in middle['structures']}
+    return {
+        item['name']: item['bytes'] / before[item['name']] if before.get(item['name']) else None
+        for item in final['structures']
+    }
+
+
+def run_benchmark(output_dir, cardinalities=DEFAULT_CARDINALITIES, lines=200000,
+                  samples=10, keep_timeline=False, seed=0):
+    """Gera um log por cardinalidade e mede a memória ao longo da análise"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    results = {}
+    for urls in cardinalities:
+        log_path = output_dir / f"sintetico_{urls}_urls.log"
+        print(f"🧪 Gerando {lines:,} linhas com {urls:,} URLs únicas: {log_path}")
+        generate_log(log_path, lines, urls, seed=seed)
+        
+        print(f"   Medindo {samples} pontos com tracemalloc...")
+        _, measurements = profile_analysis(log_path, samples, keep_timeline=keep_timeline)
+        results[urls] = measurements
+    return results
+
+
+def save_benchmark_csv(results, output_file):
+    """Salva uma linha por (cardinalidade, medição, estrutura)"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'URLs_Unicas',
+            'Linhas',
+            'Estrutura',
+            'Entradas',
+            'Entradas_Internas',
+            'Bytes',
+            'Tracemalloc_Bytes'
+        ])
+        
+        for urls, measurements in results.items():
+            for usage in measurements:
+                for item in usage['structures']:
+                    writer.writerow([
+                        urls,
+                        usage['lines'],
+                        item['name'],
+                        item['entries'] if item['entries'] is not None else '',
+                        item['nested_entries'] if item['nested_entries'] is not None else '',
+                        item['bytes'],
+                        usage['traced_current']
+                    ])
+    
+    print(f"💾 Medições salvas em: {output_file}")
+
+
+def format_benchmark(results, width=50):
+    """Gráfico em texto da memória rastreada por linhas lidas e resumo por estrutura"""
+    lines = []
+    lines.append("=" * 80)
+    lines.append("🧠 BENCHMARK DE MEMÓRIA")
+    lines.append("=" * 80)
+    
+    peak = max(usage['traced_current'] for measurements in results.values() for usage in measurements)
+    for urls, measurements in results.items():
+        lines.append("")
+        lines.append(f"📈 {urls:,} URLs únicas (MB rastreados pelo tracemalloc x linhas lidas)")
+        lines.append("-" * 80)
+        for usage in measurements:
+            mb = usage['traced_current'] / 1048576
+            bar = '█' * max(1, round(usage['traced_current'] / peak * width))
+            lines.append(f"  {usage['lines']:>10,} {bar} {mb:.1f} MB")
+    
+    # Estruturas no fim de cada análise e crescimento com as linhas
+    cardinalities = list(results)
+    growth = line_growth(results[cardinalities[0]])
+    final = {urls: {item['name']: item for item in measurements[-1]['structures']}
+             for urls, measurements in results.items()}
+    names = sorted(final[cardinalities[-1]], key=lambda name: final[cardinalities[-1]][name]['bytes'],
+                   reverse=True)
+    
+    lines.append("")
+    lines.append("📦 ESTRUTURAS NO FIM DA ANÁLISE (MB por cardinalidade)")
+    lines.append("-" * 80)
+    lines.append(f"  {'Estrutura':22s}" + ''.join(f"{urls:>12,}" for urls in cardinalities) + "  Cresce com")
+    for name in names:
+        sizes = ''.join(
+            f"{final[urls][name]['bytes'] / 1048576:12.2f}" if name in final[urls] else f"{'-':>12s}"
+            for urls in cardinalities
+        )
+        factor = growth.get(name)
+        grows = 'linhas' if factor is not None and factor >= LINE_GROWTH_THRESHOLD else 'URLs/IPs'
+        lines.append(f"  {name:22s}{sizes}  {grows}")
+    lines.append("")
+    lines.append(f"'linhas': cresceu {LINE_GROWTH_THRESHOLD}x ou mais entre a metade e o fim da análise "
+                 f"com {cardinalities[0]:,} URLs (cardinalidade já saturada)")
+    
+    last = results[cardinalities[-1]][-1]
+    if last['top_allocations']:
+        lines.append("")
+        lines.append(f"📍 LINHAS QUE MAIS ALOCARAM ({cardinalities[-1]:,} URLs)")
+        lines.append("-" * 80)
+        for item in last['top_allocations']:
+            lines.append(f"  {item['location']:40s} {item['bytes'] / 1048576:9.2f} MB ({item['blocks']:,} blocos)")
+    
+    lines.append("=" * 80)
+    return "\n".join(lines)
+
+
+def main():
+    """Função principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Mede a memória do SEO Log Analyzer em logs sintéticos de cardinalidade crescente')
+    parser.add_argument('--output-dir', default='benchmark_memoria',
+                        help='Diretório dos logs sintéticos e resultados (padrão: benchmark_memoria)')
+    parser.add_argument('--urls', type=int, action='append', metavar='N',
+                        help='Cardinalidade de URLs a medir; repita para várias '
+                             f"(padrão: {', '.join(map(str, DEFAULT_CARDINALITIES))})")
+    parser.add_argument('--lines', type=int, default=200000, help='Linhas por log sintético')
+    parser.add_argument('--samples', type=int, default=10, help='Medições ao longo de cada análise')
+    parser.add_argument('--timeline', action='store_true',
+                        help='Mede também o histórico completo de status por URL')
+    parser.add_argument('--seed', type=int, default=0, help='Semente dos logs sintéticos')
+    args = parser.parse_args()
+    
+    results = run_benchmark(args.output_dir, cardinalities=sorted(args.urls or DEFAULT_CARDINALITIES),
+                            lines=args.lines, samples=args.samples,
+                            keep_timeline=args.timeline, seed=args.seed)
+    
+    report = format_benchmark(results)
+    print("\n" + report)
+    
+    output_dir = Path(args.output_dir)
+    with open(output_dir / 'benchmark_memoria.txt', 'w', encoding='utf-8') as f:
+        f.write(report)
+    print(f"💾 Resumo salvo em: {output_dir / 'benchmark_memoria.txt'}")
+    save_benchmark_csv(results, output_dir / 'benchmark_memoria.csv')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SEO Log Compare
+Compara dois snapshots do SEOLogAnalyzer (--snapshot) sem reprocessar os logs:
+novos erros, URLs que o Googlebot deixou de visitar e a fatia dos LLM bots
+"""
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+from seo_log_analyzer import SNAPSHOT_VERSION, GOOGLE_BOTS, LLM_BOTS
+
+
+def load_snapshot(path):
+    """Carrega um snapshot salvo por SEOLogAnalyzer.save_snapshot()"""
+    path = Path(path)
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Versão de snapshot não suportada em {path}: {snapshot.get('version')}")
+    return snapshot
+
+
+def _count(counts, keys):
+    return sum(counts.get(key, 0) for key in keys)
+
+
+def _is_error(status):
+    return status.startswith(('4', '5'))
+
+
+def _shares(snapshot, bots):
+    """Fatia de cada bot nas visitas de bots e no total de requisições"""
+    bot_visits = snapshot['bot_visits']
+    total_bots = sum(bot_visits.values())
+    total_requests = snapshot['summary']['parsed_lines']
+    shares = {}
+    for bot in list(bots) + ['LLM bots']:
+        visits = _count(bot_visits, bots) if bot == 'LLM bots' else bot_visits.get(bot, 0)
+        shares[bot] = {
+            'visits': visits,
+            'share_of_bots': visits / total_bots if total_bots else 0.0,
+            'share_of_requests': visits / total_requests if total_requests else 0.0
+        }
+    return shares
+
+
+def compare_snapshots(before, after, google_bots=GOOGLE_BOTS, llm_bots=LLM_BOTS):
+    """Calcula as diferenças entre dois snapshots.
+    
+    Junta os períodos por hash da URL (um dicionário de cada lado), em tempo
+    proporcional ao número de URLs únicas.
+    """
+    old_urls, new_urls = before['urls'], after['urls']
+    
+    new_errors = []
+    fixed_errors = []
+    googlebot_new = []
+    for url, (visits, last_crawl, statuses, bots) in new_urls.items():
+        old = old_urls.get(url)
+        old_statuses = old[2] if old else {}
+        
+        for status, count in statuses.items():
+            if _is_error(status) and status not in old_statuses:
+                new_errors.append({
+                    'url': url,
+                    'status': status,
+                    'count': count,
+                    'status_before': max(old_statuses, key=old_statuses.get) if old_statuses else None
+                })
+        
+        if old and any(map(_is_error, old_statuses)) and not any(map(_is_error, statuses)):
+            fixed_errors.append({
+                'url': url,
+                'errors_before': {s: n for s, n in old_statuses.items() if _is_error(s)},
+                'status_after': max(statuses, key=statuses.get)
+            })
+        
+        googlebot = _count(bots, google_bots)
+        if googlebot and not (old and _count(old[3], google_bots)):
+            googlebot_new.append({'url': url, 'googlebot_after': googlebot})
+    
+    googlebot_dropped = []
+    for url, (visits, last_crawl, statuses, bots) in old_urls.items():
+        googlebot = _count(bots, google_bots)
+        if not googlebot:
+            continue
+        new = new_urls.get(url)
+        if new is None or not _count(new[3], google_bots):
+            googlebot_dropped.append({
+                'url': url,
+                'googlebot_before': googlebot,
+                'last_crawl_before': last_crawl,
+                'visits_after': new[0] if new else 0
+            })
+    
+    new_errors.sort(key=lambda x: x['count'], reverse=True)
+    googlebot_dropped.sort(key=lambda x: x['googlebot_before'], reverse=True)
+    googlebot_new.sort(key=lambda x: x['googlebot_after'], reverse=True)
+    
+    # Visitas por bot e fatia dos LLM bots
+    bots = {}
+    for bot in sorted(set(before['bot_visits']) | set(after['bot_visits'])):
+        old_visits = before['bot_visits'].get(bot, 0)
+        new_visits = after['bot_visits'].get(bot, 0)
+        bots[bot] = {
+            'before': old_visits,
+            'after': new_visits,
+            'change': new_visits - old_visits,
+            'change_pct': round((new_visits - old_visits) / old_visits * 100, 2) if old_visits else None
+        }
+    
+    old_shares, new_shares = _shares(before, llm_bots), _shares(after, llm_bots)
+    llm_share = {
+        bot: {
+            'visits_before': old_shares[bot]['visits'],
+            'visits_after': new_shares[bot]['visits'],
+            'share_of_bots_before': round(old_shares[bot]['share_of_bots'] * 100, 2),
+            'share_of_bots_after': round(new_shares[bot]['share_of_bots'] * 100, 2),
+            'share_of_bots_change_pp': round(
+                (new_shares[bot]['share_of_bots'] - old_shares[bot]['share_of_bots']) * 100, 2),
+            'share_of_requests_change_pp': round(
+                (new_shares[bot]['share_of_requests'] - old_shares[bot]['share_of_requests']) * 100, 2)
+        }
+        for bot in old_shares
+    }
+    
+    status_codes = {
+        status: {
+            'before': before['status_codes'].get(status, 0),
+            'after': after['status_codes'].get(status, 0)
+        }
+        for status in sorted(set(before['status_codes']) | set(after['status_codes']))
+    }
+    
+    warnings = []
+    if before['summary']['url_mode'] != after['summary']['url_mode']:
+        warnings.append(f"Agrupamento de URLs diferente: {before['summary']['url_mode']} x "
+                        f"{after['summary']['url_mode']}")
+    if before['summary']['sample_rate'] != after['summary']['sample_rate']:
+        warnings.append("Taxas de amostragem diferentes: contagens não são comparáveis diretamente")
+    
+    return {
+        'before': {'period': before['period'], 'sources': before['sources'],
+                   'parsed_lines': before['summary']['parsed_lines']},
+        'after': {'period': after['period'], 'sources': after['sources'],
+                  'parsed_lines': after['summary']['parsed_lines']},
+        'warnings': warnings,
+        'summary': {
+            'urls_before': len(old_urls),
+            'urls_after': len(new_urls),
+            'urls_added': sum(1 for url in new_urls if url not in old_urls),
+            'urls_removed': sum(1 for url in old_urls if url not in new_urls),
+            'new_errors': len(new_errors),
+            'fixed_errors': len(fixed_errors),
+            'googlebot_dropped': len(googlebot_dropped),
+            'googlebot_new': len(googlebot_new)
+        },
+        'bots': bots,
+        'llm_share': llm_share,
+        'status_codes': status_codes,
+        'new_errors': new_errors,
+        'fixed_errors': fixed_errors,
+        'googlebot_dropped': googlebot_dropped,
+        'googlebot_new': googlebot_new
+    }
+
+
+def save_diff_json(diff, output_file):
+    """Salva a comparação completa em JSON"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(diff, f, indent=2, ensure_ascii=False)
+    
+    print(f"💾 Comparação JSON salva em: {output_file}")
+
+
+def save_diff_csv(diff, output_file):
+    """Salva uma linha por URL com mudança relevante entre os períodos"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'URL',
+            'Mudanca',
+            'Status',
+            'Ocorrencias',
+            'Status_Antes',
+            'Googlebot_Antes',
+            'Googlebot_Depois',
+            'Ultimo_Rastreio_Antes'
+        ])
+        
+        for item in diff['new_errors']:
+            writer.writerow([item['url'], 'Novo erro', item['status'], item['count'],
+                             item['status_before'] or 'N/A', '', '', ''])
+        for item in diff['googlebot_dropped']:
+            writer.writerow([item['url'], 'Googlebot parou de visitar', '', item['visits_after'],
+                             '', item['googlebot_before'], 0, item['last_crawl_before'] or 'N/A'])
+        for item in diff['googlebot_new']:
+            writer.writerow([item['url'], 'Googlebot passou a visitar', '', '',
+                             '', 0, item['googlebot_after'], ''])
+        for item in diff['fixed_errors']:
+            writer.writerow([item['url'], 'Erro corrigido', item['status_after'],
+                             sum(item['errors_before'].values()),
+                             ', '.join(sorted(item['errors_before'])), '', '', ''])
+    
+    print(f"💾 Comparação CSV salva em: {output_file}")
+
+
+def format_diff(diff, top=10):
+    """Resumo em texto da comparação"""
+    summary = diff['summary']
+    lines = []
+    lines.append("=" * 80)
+    lines.append("🔀 COMPARAÇÃO ENTRE PERÍODOS")
+    lines.append("=" * 80)
+    for label, key in (("Antes", 'before'), ("Depois", 'after')):
+        period = diff[key]['period']
+        lines.append(f"{label}: {period['first'] or '?'} até {period['last'] or '?'} "
+                     f"({diff[key]['parsed_lines']:,} requisições)")
+    for warning in diff['warnings']:
+        lines.append(f"⚠️ {warning}")
+    lines.append("")
+    lines.append(f"URLs: {summary['urls_before']:,} -> {summary['urls_after']:,} "
+                 f"(+{summary['urls_added']:,} novas, -{summary['urls_removed']:,} sumiram)")
+    lines.append(f"Novos erros (4xx/5xx): {summary['new_errors']:,}")
+    lines.append(f"Erros corrigidos: {summary['fixed_errors']:,}")
+    lines.append(f"URLs que o Googlebot parou de visitar: {summary['googlebot_dropped']:,}")
+    lines.append(f"URLs que o Googlebot passou a visitar: {summary['googlebot_new']:,}")
+    lines.append("")
+    
+    lines.append("🤖 FATIA DOS LLM BOTS (% das visitas de bots)")
+    lines.append("-" * 80)
+    for bot, item in diff['llm_share'].items():
+        lines.append(f"{bot:15s}: {item['share_of_bots_before']:6.2f}% -> {item['share_of_bots_after']:6.2f}% "
+                     f"({item['share_of_bots_change_pp']:+.2f} p.p.)")
+    lines.append("")
+    
+    if diff['new_errors']:
+        lines.append(f"⚠️ NOVOS ERROS (top {top})")
+        lines.append("-" * 80)
+        for item in diff['new_errors'][:top]:
+            lines.append(f"  [{item['status']}] {item['count']:6,}x {item['url'][:65]}")
+        lines.append("")
+    
+    if diff['googlebot_dropped']:
+        lines.append(f"🔍 GOOGLEBOT PAROU DE VISITAR (top {top})")
+        lines.append("-" * 80)
+        for item in diff['googlebot_dropped'][:top]:
+            lines.append(f"  {item['googlebot_before']:6,}x antes  {item['url'][:65]}")
+        lines.append("")
+    
+    lines.append("=" * 80)
+    return "\n".join(lines)
+
+
+def main():
+    """Função principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Compara dois snapshots do SEO Log Analyzer')
+    parser.add_argument('before', help='Snapshot do período anterior (seo_log_analyzer.py --snapshot)')
+    parser.add_argument('after', help='Snapshot do período atual')
+    parser.add_argument('--output-dir', help='Diretório dos relatórios (padrão: o do snapshot atual)')
+    parser.add_argument('--top', type=int, default=10, help='URLs listadas por seção no resumo')
+    args = parser.parse_args()
+    
+    before = load_snapshot(args.before)
+    after = load_snapshot(args.after)
+    diff = compare_snapshots(before, after)
+    
+    print(format_diff(diff, top=args.top))
+    
+    output_dir = Path(args.output_dir) if args.output_dir else Path(args.after).parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    save_diff_json(diff, output_dir / 'comparacao_periodos.json')
+    save_diff_csv(diff, output_dir / 'comparacao_urls.csv')
+
+
+if __name__ == '__main__':
+    main()
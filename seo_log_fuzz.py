@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SEO Log Fuzz
+Compara o parser rápido do formato combined (CombinedFormat.parse_fields e
+parse_clf_time) com a regex de referência em linhas mutadas aleatoriamente.
+Rode de novo sempre que a regex ou o caminho rápido mudarem.
+"""
+
+import random
+import sys
+from datetime import datetime
+
+from log_formats import CombinedFormat, parse_clf_time
+
+
+# Caracteres inseridos pelas mutações: delimitadores do formato, espaços
+# não triviais e dígitos não ASCII
+MUTATION_ALPHABET = ' "[]-\t0123456789./:aZ²٣'
+
+# IPs (válidos ou não) trocados no início das linhas
+IP_SAMPLES = ['66.249.66.1', '2001:db8::1', '::1', '::ffff:66.249.1.2', 'fe80::1%eth0', 'g::1',
+              '2001:db8:.:1', '.1:2', '1.2:3', ':', 'abc', 'ABCD:EF01::',
+              '2001:0db8:85a3:0000:0000:8a2e:0370:7334']
+
+MONTHS = ['Jan', 'Feb', 'Oct', 'Dec', 'oct', 'Foo']
+
+# Casos de borda fixos
+EDGE_CASES = ['', ' ', '1 - - [x] "" 200 -', '1 - - [x] "" 200 - ""', '1 - - [x] "" 200 12a',
+              '1.2 a b [t] "r" 200 5 "ref"  "ua"']
+
+
+def seed_lines(rng, count=2000):
+    """Linhas combined válidas e variadas para servir de base às mutações"""
+    agents = ['Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+              'GPTBot/1.2', 'Mozilla/5.0 (Windows NT 10.0) Chrome/120', '-', '']
+    lines = []
+    for _ in range(count):
+        lines.append('{ip} {ident} {user} [{day:02d}/{month}/2026:{h:02d}:{m:02d}:{s:02d} -0300] '
+                     '"{request}" {status} {size} "{referer}" "{agent}"'.format(
+                         ip=rng.choice(IP_SAMPLES[:5]),
+                         ident=rng.choice(['-', 'ident']),
+                         user=rng.choice(['-', 'frank']),
+                         day=rng.randint(1, 28), month=rng.choice(MONTHS[:4]),
+                         h=rng.randint(0, 23), m=rng.randint(0, 59), s=rng.randint(0, 59),
+                         request=rng.choice(['GET /produto/1?id=2 HTTP/1.1', 'POST /api HTTP/2.0',
+                                             'GET /', '-', '']),
+                         status=rng.choice(['200', '301', '404', '500']),
+                         size=rng.choice(['0', '512', '-']),
+                         referer=rng.choice(['-', 'https://www.google.com/']),
+                         agent=rng.choice(agents)))
+    return lines
+
+
+def mutate(rng, line):
+    """Insere, remove ou troca de 1 a 4 caracteres"""
+    chars = list(line)
+    for _ in range(rng.randint(1, 4)):
+        op = rng.random()
+        i = rng.randrange(len(chars) + 1)
+        if op < .4:
+            chars.insert(i, rng.choice(MUTATION_ALPHABET))
+        elif op < .8 and chars:
+            del chars[min(i, len(chars) - 1)]
+        elif chars:
+            chars[min(i, len(chars) - 1)] = rng.choice(MUTATION_ALPHABET)
+    return ''.join(chars)
+
+
+def build_corpus(rng, seeds, mutations=200000, ip_swaps=50000):
+    corpus = list(seeds) + EDGE_CASES
+    for _ in range(mutations):
+        corpus.append(mutate(rng, rng.choice(seeds)))
+    for _ in range(ip_swaps):
+        line = rng.choice(seeds)
+        ip = rng.choice(IP_SAMPLES)
+        if rng.random() < .5:
+            ip = mutate(rng, ip)
+        corpus.append(ip + line[line.find(' '):])
+    return corpus
+
+
+def check_fields(corpus, log_format):
+    """Linhas em que parse_fields aceita mas difere de parse_regex"""
+    mismatches = []
+    accepted = 0
+    for line in corpus:
+        fast = log_format.parse_fields(line)
+        if fast is None:
+            continue
+        accepted += 1
+        if fast != log_format.parse_regex(line):
+            mismatches.append(line)
+    return accepted, mismatches
+
+
+def _reference_time(value):
+    try:
+        return datetime.strptime(value.split()[0], '%d/%b/%Y:%H:%M:%S')
+    except (ValueError, IndexError):
+        return None
+
+
+def check_times(rng, count=200000):
+    """Timestamps em que parse_clf_time difere de strptime"""
+    mismatches = []
+    for _ in range(count):
+        value = '%02d/%s/%04d:%02d:%02d:%02d -0300' % (
+            rng.randint(0, 32), rng.choice(MONTHS), rng.randint(1, 9999),
+            rng.randint(0, 25), rng.randint(0, 61), rng.randint(0, 61))
+        if rng.random() < .3:
+            value = mutate(rng, value)
+        try:
+            fast = parse_clf_time(value)
+        except (ValueError, IndexError):
+            fast = None
+        if fast != _reference_time(value):
+            mismatches.append(value)
+    return mismatches
+
+
+def main():
+    """Função principal"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Fuzz do parser rápido do formato combined contra a regex')
+    parser.add_argument('log_files', nargs='*', help='Logs reais usados como base das mutações (opcional)')
+    parser.add_argument('--mutations', type=int, default=200000, help='Linhas mutadas (padrão: 200000)')
+    parser.add_argument('--seed', type=int, default=7, help='Semente do gerador aleatório')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    seeds = seed_lines(rng)
+    for path in args.log_files:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            seeds.extend(line.rstrip('\n') for line in f)
+    
+    corpus = build_corpus(rng, seeds, args.mutations, args.mutations // 4)
+    accepted, field_mismatches = check_fields(corpus, CombinedFormat())
+    time_mismatches = check_times(rng, args.mutations)
+    
+    print(f"🧪 {len(corpus):,} linhas, {accepted:,} aceitas pelo caminho rápido")
+    print(f"   Divergências de campos: {len(field_mismatches):,}")
+    for line in field_mismatches[:10]:
+        print(f"     {line!r}")
+    print(f"   Divergências de timestamp: {len(time_mismatches):,}")
+    for value in time_mismatches[:10]:
+        print(f"     {value!r}")
+    
+    if field_mismatches or time_mismatches:
+        sys.exit(1)
+    print("✅ Caminho rápido idêntico à regex")
+
+
+if __name__ == '__main__':
+    main()